@@ -0,0 +1,51 @@
+# advocateshub/benchutils.py
+"""Fixtures shared by the benchmark and load-test management commands."""
+import datetime
+import uuid
+
+from django.core.management.base import CommandError
+from django.db import connection
+
+from advocateshub.models import User
+from bookingapi.models import Booking
+from clientapi.models import Client
+from lawyerapi.models import Lawyer
+
+
+def ensure_scratch_database():
+    """
+    Benchmarks write fixture users, bookings and messages; refuse unless the
+    database is SQLite or a test database (test_*), never a shared one.
+    """
+    name = str(connection.settings_dict['NAME'])
+    if connection.vendor != 'sqlite' and not name.startswith('test_'):
+        raise CommandError(
+            f"Refusing to create benchmark fixtures in {connection.vendor} database {name!r}; "
+            "run against SQLite (USE_SQLITE=true) or a test_* database."
+        )
+
+
+def create_booking_fixture():
+    """
+    A confirmed booking between a new client and lawyer. Returns the booking
+    and both users; deleting the users removes everything else.
+    """
+    ensure_scratch_database()
+    tag = uuid.uuid4().hex[:8]
+    client_user = User.objects.create_user(
+        username=f'bench-client-{tag}', email=f'bench-client-{tag}@example.com',
+        name='Bench Client', phone='0', role='client',
+    )
+    lawyer_user = User.objects.create_user(
+        username=f'bench-lawyer-{tag}', email=f'bench-lawyer-{tag}@example.com',
+        name='Bench Lawyer', phone='0', role='lawyer',
+    )
+    client = Client.objects.create(user=client_user, language='English', dob=datetime.date(1990, 1, 1))
+    lawyer = Lawyer.objects.create(
+        user=lawyer_user, cnic='0', education='LLB', location='Bench', court_level='District',
+        case_types='Civil', experience='1', availability='', price=0,
+    )
+    booking = Booking.objects.create(
+        client=client, lawyer=lawyer, scheduled_for=datetime.datetime.now(), status='confirmed',
+    )
+    return booking, [client_user, lawyer_user]
@@ -0,0 +1,83 @@
+# advocateshub/middleware.py
+import hashlib
+import time
+from urllib.parse import parse_qs
+
+from channels.db import database_sync_to_async
+from channels.middleware import BaseMiddleware
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+User = get_user_model()
+
+# Browsers cannot set headers on a WebSocket, so the access token is sent either
+# as `?token=<jwt>` or as the subprotocol pair ["access_token", "<jwt>"].
+JWT_SUBPROTOCOL = 'access_token'
+
+
+def _token_cache_key(raw_token):
+    return 'ws_jwt:' + hashlib.sha256(raw_token.encode()).hexdigest()
+
+
+@database_sync_to_async
+def get_user_for_token(raw_token):
+    """
+    Validates an access token and returns its user (or AnonymousUser).
+    Resolved users are cached for a short time so reconnects skip the DB.
+    """
+    cache_key = _token_cache_key(raw_token)
+    user = cache.get(cache_key)
+    if user is not None:
+        return user
+
+    try:
+        token = AccessToken(raw_token)
+    except TokenError:
+        return AnonymousUser()
+
+    user = User.objects.filter(pk=token[api_settings.USER_ID_CLAIM], is_active=True).first()
+    if user is None:
+        return AnonymousUser()
+
+    # Never cache a user past the token's own expiry
+    ttl = min(settings.WS_JWT_CACHE_TTL, int(token['exp'] - time.time()))
+    if ttl > 0:
+        cache.set(cache_key, user, ttl)
+    return user
+
+
+class JWTAuthMiddleware(BaseMiddleware):
+    """
+    Populates scope['user'] from a simplejwt access token, once per connection.
+    """
+
+    async def __call__(self, scope, receive, send):
+        scope = dict(scope)
+        raw_token, subprotocol = self.get_raw_token(scope)
+
+        scope['user'] = await get_user_for_token(raw_token) if raw_token else AnonymousUser()
+        # Consumers must echo the subprotocol back in accept() or the browser drops the socket
+        scope['auth_subprotocol'] = subprotocol
+        return await super().__call__(scope, receive, send)
+
+    def get_raw_token(self, scope):
+        query = parse_qs(scope.get('query_string', b'').decode())
+        if query.get('token'):
+            return query['token'][0], None
+
+        subprotocols = scope.get('subprotocols') or []
+        if JWT_SUBPROTOCOL in subprotocols:
+            index = subprotocols.index(JWT_SUBPROTOCOL)
+            if index + 1 < len(subprotocols):
+                return subprotocols[index + 1], JWT_SUBPROTOCOL
+
+        return None, None
+
+
+def JWTAuthMiddlewareStack(inner):
+    return JWTAuthMiddleware(inner)
@@ -0,0 +1,69 @@
+# advocateshub/pagination.py
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class IdKeysetPagination(BasePagination):
+    """
+    Keyset pagination over row id, newest page first.
+
+    `next` (?before=<id>) points at the page of older rows. Filtering on the
+    cursor instead of OFFSET keeps every page a range scan on an index ending
+    in id, however far back the client goes. Pages come newest first unless
+    `oldest_first` is set.
+    """
+    page_size = 20
+    max_page_size = 100
+    cursor_query_param = 'before'
+    page_size_query_param = 'limit'
+    oldest_first = False
+
+    def paginate_queryset(self, queryset, request, view=None):
+        def fetch(before, count):
+            if before is not None:
+                return list(queryset.filter(id__lt=before).order_by('-id')[:count])
+            return list(queryset.order_by('-id')[:count])
+        return self.paginate_rows(fetch, request)
+
+    def paginate_rows(self, fetch, request):
+        """Pages over rows from fetch(before, count), which returns up to `count` rows newest first."""
+        self.request = request
+        limit = self.get_page_size(request)
+
+        rows = fetch(self.get_cursor(request), limit + 1)
+        self.has_more = len(rows) > limit
+        rows = rows[:limit]
+        self.next_cursor = rows[-1].id if self.has_more else None
+        if self.oldest_first:
+            rows.reverse()
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def get_cursor(self, request):
+        before = request.query_params.get(self.cursor_query_param)
+        if not before:
+            return None
+        try:
+            return int(before)
+        except ValueError:
+            raise ValidationError({self.cursor_query_param: "Invalid cursor."})
@@ -115,6 +115,7 @@ class ClientSerializer(serializers.ModelSerializer):
 # ✅ Lawyer Serializer
 class LawyerSerializer(serializers.ModelSerializer):
     user = UserNestedSerializer()  # replaces user_profile
+    rating_histogram = serializers.ReadOnlyField()  # stored counters, no extra query
 
     class Meta:
         model = Lawyer
@@ -122,7 +123,7 @@ class LawyerSerializer(serializers.ModelSerializer):
             'id', 'user', 'cnic', 'education', 'degree', 'aadhar', 'pan', 'bar',
             'location', 'court_level', 'case_types', 'experience',
             'availability', 'price', 'profile_status', 'available_slots', 'languages',
-            'average_rating', 'review_count'
+            'average_rating', 'review_count', 'rating_histogram'
         ]
 
 # _____________________________________________________________________________
@@ -135,13 +136,20 @@ class BookingSerializer(serializers.ModelSerializer):
 
 # ______________________________________________________________________________________
 class ChatMessageSerializer(serializers.ModelSerializer):
-    sender_name = serializers.CharField(source='sender.name', read_only=True)
-
     class Meta:
         model = ChatMessage
         fields = ['id', 'booking', 'sender', 'sender_name', 'message', 'timestamp']
 
 
+class ChatSearchHitSerializer(serializers.ModelSerializer):
+    # Matched terms are wrapped in ** markers
+    snippet = serializers.CharField(read_only=True)
+
+    class Meta:
+        model = ChatMessage
+        fields = ['id', 'booking', 'sender_name', 'timestamp', 'snippet']
+
+
 # _________________________________________________________________________________________________________
 
     
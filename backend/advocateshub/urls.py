@@ -16,14 +16,10 @@ from .views import (
     # Notifications
     NotificationAPIView,MarkNotificationsSeenAPI,
 
-    # chat
-    ChatHistoryAPI,
-
-   
-
     # contact 
     ContactQueryView
 )
+from chat.views import ChatHistoryAPI, ChatSearchAPI, UnreadCountsAPI
 
 
 urlpatterns = [
@@ -63,6 +59,8 @@ urlpatterns = [
     path('mark-seen/', MarkNotificationsSeenAPI.as_view(), name='mark-notifications-seen'),
 
     path('history/<int:booking_id>/', ChatHistoryAPI.as_view(), name='chat-history'),
+    path('chat/unread/', UnreadCountsAPI.as_view(), name='chat-unread-counts'),
+    path('chat/search/', ChatSearchAPI.as_view(), name='chat-search'),
 
 
     #contact
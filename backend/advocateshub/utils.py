@@ -1,14 +1,7 @@
 # utils : 
-from twilio.jwt.access_token import AccessToken
-from twilio.jwt.access_token.grants import VideoGrant
-from django.conf import settings
+from videosession.providers import get_provider
+
 
 def generate_twilio_token(identity, room_name):
-    token = AccessToken(
-        settings.TWILIO_ACCOUNT_SID,
-        settings.TWILIO_API_KEY,
-        settings.TWILIO_API_SECRET,
-        identity=identity
-    )
-    token.add_grant(VideoGrant(room=room_name))
-    return token.to_jwt()
\ No newline at end of file
+    # Minted by the configured video provider (settings.COMMS_PROVIDER), Twilio by default
+    return get_provider().video_token(identity, room_name)
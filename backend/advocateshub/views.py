@@ -9,9 +9,8 @@ from .models import User,ContactQuery
 from clientapi.models import Client
 from lawyerapi.models import Lawyer
 from bookingapi.models import Booking
-from chat.models import ChatMessage
 # from videosession.models import VideoSession
-from .serializers import RegisterSerializer, LawyerSerializer, BookingSerializer,ChatMessageSerializer,ContactQuerySerializer
+from .serializers import RegisterSerializer, LawyerSerializer, BookingSerializer,ContactQuerySerializer
 from datetime import datetime
 from rest_framework.serializers import ValidationError
 from rest_framework.decorators import api_view, permission_classes
@@ -269,6 +268,7 @@ class AllLawyersAPI(APIView):
             "profile_status": l.profile_status,
             "average_rating": l.average_rating,
             "review_count": l.review_count,
+            "rating_histogram": l.rating_histogram,
             "signup_date": l.user.date_joined.strftime("%d %B %Y"),
             "phone": l.user.phone,
             "degree": request.build_absolute_uri(l.degree.url) if l.degree else None,
@@ -294,7 +294,8 @@ class ApprovedLawyersAPIView(APIView):
     permission_classes = [AllowAny]
 
     def get(self, request):
-        lawyers = Lawyer.objects.filter(profile_status='approved')
+        # Best-ranked first, straight off the lawyer_ranking index (see lawyerapi.ranking)
+        lawyers = Lawyer.objects.filter(profile_status='approved').select_related('user').order_by('-ranking_score', 'id')
         return Response(LawyerSerializer(lawyers, many=True, context={'request': request}).data)
 
 
@@ -638,15 +639,6 @@ class MarkNotificationsSeenAPI(APIView):
 
 
 
-# ____________________________________________________________________
-
-class ChatHistoryAPI(APIView):
-    permission_classes = [IsAuthenticated]
-
-    def get(self, request, booking_id):
-        messages = ChatMessage.objects.filter(booking__id=booking_id).order_by("timestamp")
-        serializer = ChatMessageSerializer(messages, many=True)
-        return Response(serializer.data)
 # ________________________________________________________________________________________________________
         
 
@@ -11,16 +11,20 @@ import os
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
 from channels.routing import ProtocolTypeRouter, URLRouter
 from django.core.asgi import get_asgi_application
-from channels.auth import AuthMiddlewareStack
+django_asgi_app = get_asgi_application()
+
+from advocateshub.middleware import JWTAuthMiddlewareStack
 import chat.routing
 import videosession.routing # Import the new routing file
 
 application = ProtocolTypeRouter({
-    "http": get_asgi_application(),
-    "websocket": AuthMiddlewareStack(
+    "http": django_asgi_app,
+    # WebSockets authenticate with the same simplejwt access token as the REST API
+    "websocket": JWTAuthMiddlewareStack(
         URLRouter(
             # Combine the urlpatterns from both apps
-            videosession.routing.websocket_urlpatterns
+            chat.routing.websocket_urlpatterns
+            + videosession.routing.websocket_urlpatterns
         )
     ),
 })
@@ -143,6 +143,9 @@ SIMPLE_JWT = {
     'AUTH_HEADER_TYPES': ('Bearer',),
 }
 
+# How long a WebSocket handshake may reuse a previously decoded token -> user lookup
+WS_JWT_CACHE_TTL = int(os.getenv('WS_JWT_CACHE_TTL', '60'))
+
 # CORS Configuration
 CORS_ALLOWED_ORIGINS = os.getenv('CORS_ALLOWED_ORIGINS', 'http://localhost:5173').split(',')
 CORS_ALLOW_CREDENTIALS = True
@@ -162,15 +165,89 @@ CORS_ALLOWED_METHODS = [
     'DELETE', 'GET', 'OPTIONS', 'PATCH', 'POST', 'PUT'
 ]
 
-# Channels
-CHANNEL_LAYERS = {
-    'default': {
-        'BACKEND': 'channels_redis.core.RedisChannelLayer',
-        'CONFIG': {
-            "hosts": [('localhost', 6379)],
+# Channels: CHANNEL_LAYER=memory runs the layer inside the process, for single-worker
+# deployments and tests. Otherwise channels_redis shards groups and channels across
+# every URL in CHANNEL_REDIS_HOSTS by consistent hashing.
+CHANNEL_LAYER = os.getenv('CHANNEL_LAYER', 'redis').lower()
+CHANNEL_LAYER_CONFIG = {
+    # Messages a channel may hold before sends to it fail; group_send drops silently past it
+    'capacity': int(os.getenv('CHANNEL_CAPACITY', '100')),
+    'expiry': int(os.getenv('CHANNEL_EXPIRY', '60')),
+    # Must outlive the longest open socket (notification sockets stay up all day)
+    'group_expiry': int(os.getenv('CHANNEL_GROUP_EXPIRY', '86400')),
+}
+if CHANNEL_LAYER == 'memory':
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels.layers.InMemoryChannelLayer',
+            'CONFIG': CHANNEL_LAYER_CONFIG,
         },
-    },
+    }
+else:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels_redis.core.RedisChannelLayer',
+            'CONFIG': {
+                'hosts': os.getenv('CHANNEL_REDIS_HOSTS', 'redis://localhost:6379').split(','),
+                'prefix': os.getenv('CHANNEL_PREFIX', 'asgi'),
+                **CHANNEL_LAYER_CONFIG,
+                # channels_redis queues everything for one worker's sockets in a single
+                # "specific.<worker>!" list, so a burst of ICE trickles across a worker's
+                # rooms meets this limit, not the per-channel capacity above
+                'channel_capacity': {
+                    'specific.*': int(os.getenv('CHANNEL_SPECIFIC_CAPACITY', '2000')),
+                },
+            },
+        },
+    }
+
+# Cache: WebSocket presence (who is in a room, which drives peer_present, call
+# invites and when a video session ends) lives here, so every worker must see the
+# same cache. It follows the channel layer by default: Redis at CACHE_REDIS_URL
+# alongside the Redis layer, and a per-process LocMemCache with the in-memory one.
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'locmem' if CHANNEL_LAYER == 'memory' else 'redis').lower()
+if CACHE_BACKEND == 'redis':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('CACHE_REDIS_URL', 'redis://localhost:6379/1'),
+            'KEY_PREFIX': os.getenv('CACHE_PREFIX', 'advocateshub'),
+        },
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        },
+    }
+
+# Chat persistence: when enabled, consumers broadcast immediately and buffer messages
+# per process, saving them with bulk_create on whichever threshold is hit first.
+# Broadcast messages then have no id, so read receipts are sent without one (meaning
+# "read everything so far") and socket resume via ?since= replays full history instead.
+CHAT_WRITE_BEHIND = os.getenv('CHAT_WRITE_BEHIND', 'False').lower() == 'true'
+CHAT_WRITE_BEHIND_BATCH_SIZE = int(os.getenv('CHAT_WRITE_BEHIND_BATCH_SIZE', '50'))
+CHAT_WRITE_BEHIND_FLUSH_INTERVAL = float(os.getenv('CHAT_WRITE_BEHIND_FLUSH_INTERVAL', '0.5'))
+
+# Raw getStats() samples from calls are kept this long; per-minute rollups are kept for good
+CALL_QUALITY_RETENTION_HOURS = int(os.getenv('CALL_QUALITY_RETENTION_HOURS', '72'))
+
+# The archive_chat job moves transcripts of bookings idle for this long into gzipped files under MEDIA_ROOT
+CHAT_ARCHIVE_AFTER_DAYS = int(os.getenv('CHAT_ARCHIVE_AFTER_DAYS', '180'))
+
+# Inbound WebSocket rate limits per connection and message type: (frames per second, burst).
+# Signaling gets a large burst because browsers trickle ICE candidates all at once.
+WS_RATE_LIMITS = {
+    'chat_message': (float(os.getenv('WS_CHAT_RATE', '5')), int(os.getenv('WS_CHAT_BURST', '10'))),
+    'offer': (1, 5),
+    'answer': (1, 5),
+    'ice_candidate': (float(os.getenv('WS_ICE_RATE', '20')), int(os.getenv('WS_ICE_BURST', '100'))),
+    'typing': (10, 20),
+    'call_stats': (1, 5),
+    'default': (5, 10),
 }
+# Close the socket (code 4429) after this many frames in a row have been dropped
+WS_RATE_LIMIT_CLOSE_AFTER = int(os.getenv('WS_RATE_LIMIT_CLOSE_AFTER', '50'))
 
 
 # Twilio credentials
@@ -178,6 +255,12 @@ TWILIO_ACCOUNT_SID = os.getenv('TWILIO_ACCOUNT_SID')
 TWILIO_API_KEY = os.getenv('TWILIO_API_KEY')
 TWILIO_API_SECRET = os.getenv('TWILIO_API_SECRET')
 
+# Video/chat backend behind the token endpoints. videosession.providers.FakeProvider
+# needs no network or credentials, for offline benchmarks and tests.
+COMMS_PROVIDER = os.getenv('COMMS_PROVIDER', 'videosession.providers.TwilioProvider')
+# Simulated round trip of each channel fetch/create under FakeProvider
+FAKE_COMMS_LATENCY_MS = int(os.getenv('FAKE_COMMS_LATENCY_MS', '80'))
+
 
 
 # from pathlib import Path
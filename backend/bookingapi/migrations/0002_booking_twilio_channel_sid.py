@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-19 19:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookingapi', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='twilio_channel_sid',
+            field=models.CharField(blank=True, max_length=34, null=True),
+        ),
+    ]
@@ -1,7 +1,28 @@
 from django.db import models
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from clientapi.models import Client
+from lawyerapi import ranking
 from lawyerapi.models import Lawyer
 
+
+class BookingQuerySet(models.QuerySet):
+    def for_participant(self, user):
+        # Bookings where the user is either the client or the lawyer
+        return self.filter(models.Q(client__user=user) | models.Q(lawyer__user=user))
+
+    def peer_user_id(self, booking_id, user):
+        """Returns the other participant's user id, or None if `user` is not part of the booking."""
+        booking = self.filter(id=booking_id).values('client__user_id', 'lawyer__user_id').first()
+        if booking is None:
+            return None
+        if user.id == booking['client__user_id']:
+            return booking['lawyer__user_id']
+        if user.id == booking['lawyer__user_id']:
+            return booking['client__user_id']
+        return None
+
+
 class Booking(models.Model):
     client = models.ForeignKey(Client, on_delete=models.CASCADE)
     lawyer = models.ForeignKey(Lawyer, on_delete=models.CASCADE)
@@ -20,7 +41,22 @@ class Booking(models.Model):
     location = models.CharField(max_length=255, null=True, blank=True)
     duration = models.IntegerField(null=True, blank=True)
     reschedule_reason = models.TextField(null=True, blank=True)  # ✅ New field
+    # Twilio Chat channel for this booking, saved the first time a chat token is issued
+    twilio_channel_sid = models.CharField(max_length=34, null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = BookingQuerySet.as_manager()
+
     def __str__(self):
         return f"Booking by {self.client.user.username} with {self.lawyer.user.username} on {self.scheduled_for}"
+
+
+# --- Signal to keep the lawyer's booking recency and search rank current ---
+@receiver(post_save, sender=Booking)
+def update_lawyer_ranking_on_save(sender, instance, **kwargs):
+    ranking.booking_made(instance)
+
+
+@receiver(post_delete, sender=Booking)
+def update_lawyer_ranking_on_delete(sender, instance, **kwargs):
+    ranking.booking_withdrawn(instance)
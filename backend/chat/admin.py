@@ -1,4 +1,6 @@
 from django.contrib import admin
-from .models import ChatMessage
+from .models import ChatArchive, ChatMessage, ChatReadState
 
 admin.site.register(ChatMessage)
+admin.site.register(ChatReadState)
+admin.site.register(ChatArchive)
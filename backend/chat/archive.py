@@ -0,0 +1,100 @@
+# chat/archive.py
+"""
+Cold storage for old consultation transcripts.
+
+archive_booking() copies a booking's messages into a gzipped JSON-lines file,
+records it as a ChatArchive and only then deletes the rows, in batches. The
+history reads in chat.store fall back to the archive for anything older than
+the rows still in the table, so clients never see the difference.
+
+Archived messages no longer count towards unread badges or show up in search.
+"""
+import gzip
+import json
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+from django.core.files.base import ContentFile
+from django.db.models import OuterRef, Subquery
+
+from bookingapi.models import Booking
+from chat.models import ChatArchive, ChatMessage
+
+
+def bookings_to_archive(days):
+    """Bookings scheduled, and last chatted in, more than `days` days ago that still have messages."""
+    cutoff = datetime.now() - timedelta(days=days)
+    # Newest message per booking via the (booking, id) index rather than a MAX() over every row
+    last_message_at = ChatMessage.objects.filter(booking=OuterRef('pk')).order_by('-id').values('timestamp')[:1]
+    return (
+        Booking.objects
+        .filter(scheduled_for__lt=cutoff)
+        .annotate(last_message_at=Subquery(last_message_at))
+        .filter(last_message_at__lt=cutoff)
+    )
+
+
+def archive_booking(booking, batch_size=1000):
+    """Moves the booking's messages into its archive file; returns how many were moved."""
+    archive = ChatArchive.objects.filter(booking=booking).first()
+    previous_file = archive.file.name if archive else None
+    lines = read_lines(archive.file.name) if archive else []
+    archived_up_to = archive.last_message_id if archive else 0
+
+    rows = ChatMessage.objects.filter(booking=booking).order_by('id')
+    ids = []
+    for msg in rows.iterator(chunk_size=batch_size):
+        ids.append(msg.id)
+        # Left behind by an interrupted run; already in the file
+        if msg.id <= archived_up_to:
+            continue
+        lines.append(json.dumps({
+            'id': msg.id,
+            'sender': msg.sender_id,
+            'sender_name': msg.sender_name,
+            'message': msg.message,
+            'timestamp': msg.timestamp.isoformat(),
+        }))
+    if not ids:
+        return 0
+
+    archive = archive or ChatArchive(booking=booking)
+    data = gzip.compress(('\n'.join(lines) + '\n').encode())
+    archive.file.save(f'booking_{booking.id}.jsonl.gz', ContentFile(data), save=False)
+    archive.message_count = len(lines)
+    archive.last_message_id = max(ids[-1], archived_up_to)
+    archive.save()
+    if previous_file and previous_file != archive.file.name:
+        archive.file.storage.delete(previous_file)
+
+    # The file is safely recorded; short deletes keep locks and the FTS triggers cheap
+    for start in range(0, len(ids), batch_size):
+        ChatMessage.objects.filter(id__in=ids[start:start + batch_size]).delete()
+    return len(ids)
+
+
+def read_lines(name):
+    with ChatArchive._meta.get_field('file').storage.open(name, 'rb') as f:
+        return gzip.decompress(f.read()).decode().splitlines()
+
+
+def archived_messages(archive):
+    """The archived transcript as unsaved ChatMessage instances, oldest first."""
+    return _load(archive.booking_id, archive.file.name, archive.last_message_id)
+
+
+@lru_cache(maxsize=32)
+def _load(booking_id, name, last_message_id):
+    # last_message_id is part of the key so a re-archived booking is read afresh
+    messages = []
+    for line in read_lines(name):
+        row = json.loads(line)
+        messages.append(ChatMessage(
+            id=row['id'],
+            booking_id=booking_id,
+            sender_id=row['sender'],
+            sender_name=row['sender_name'],
+            message=row['message'],
+            timestamp=datetime.fromisoformat(row['timestamp']),
+        ))
+    return messages
@@ -0,0 +1,24 @@
+# chat/checks.py
+from django.conf import settings
+from django.core.checks import Warning, register
+
+# Cache backends whose contents only the current process can see
+PROCESS_LOCAL_CACHES = {
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+}
+
+
+@register()
+def presence_cache_check(app_configs, **kwargs):
+    """chat.presence must be visible to every worker the channel layer spans."""
+    layer = settings.CHANNEL_LAYERS.get('default', {}).get('BACKEND', '')
+    cache = settings.CACHES.get('default', {}).get('BACKEND', '')
+    if layer == 'channels.layers.InMemoryChannelLayer' or cache not in PROCESS_LOCAL_CACHES:
+        return []
+    return [Warning(
+        "The channel layer is shared between workers but the default cache is local to each process.",
+        hint="Presence, peer_present and video session bookkeeping need a shared cache; "
+             "set CACHE_BACKEND=redis and CACHE_REDIS_URL.",
+        id='chat.W001',
+    )]
@@ -1,83 +1,205 @@
-import json
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
 
+from chat import protocol, store
+from chat.notify import notify_user, user_group
+from chat.presence import Presence, is_present
+from chat.receipts import ReadReceipts
+from chat.ratelimit import ConnectionLimiter, RATE_LIMIT_CLOSE_CODE
+
 class ChatConsumer(AsyncWebsocketConsumer):
     async def connect(self):
         self.booking_id = self.scope['url_route']['kwargs']['booking_id']
         self.room_group_name = f"chat_{self.booking_id}"
+        self.user = self.scope['user']
+        self.binary = False
+        self.limiter = ConnectionLimiter(self.room_group_name)
+        self.presence = None
+        self.receipts = None
+        self.peer_present = False
+
+        # Sender identity comes from the JWT, never from the client payload
+        if not self.user.is_authenticated:
+            await self.close(code=4401)
+            return
+        self.peer_user_id = await self.get_peer_user_id(self.booking_id, self.user)
+        if self.peer_user_id is None:
+            await self.close(code=4403)
+            return
 
         await self.channel_layer.group_add(self.room_group_name, self.channel_name)
-        await self.accept()
+        await self.channel_layer.group_add(user_group(self.user.id), self.channel_name)
+        subprotocol = protocol.select_subprotocol(self.scope)
+        self.binary = subprotocol == protocol.MSGPACK_SUBPROTOCOL
+        await self.accept(subprotocol)
         print(f"✅ WebSocket connected to {self.room_group_name}")
 
+        self.receipts = ReadReceipts(self.booking_id, self.user, self.announce_read)
+        self.presence = Presence(self.room_group_name, self.user.id)
+        if await self.presence.join():
+            await self.broadcast_presence("joined")
+        self.peer_present = await is_present(self.room_group_name, self.peer_user_id)
+        if self.peer_present:
+            await self.send(**protocol.encode({
+                "type": "presence", "user_id": str(self.peer_user_id), "status": "joined"
+            }, self.binary))
+
     async def disconnect(self, close_code):
         await self.channel_layer.group_discard(self.room_group_name, self.channel_name)
+        if self.user.is_authenticated:
+            await self.channel_layer.group_discard(user_group(self.user.id), self.channel_name)
+        if self.presence and await self.presence.leave():
+            await self.broadcast_presence("left")
+        if self.receipts:
+            await self.receipts.close()
+        await store.flush()
         print(f"❌ WebSocket disconnected from {self.room_group_name}")
 
-    async def receive(self, text_data):
+    async def receive(self, text_data=None, bytes_data=None):
         try:
-            from chat.models import ChatMessage       # moved here
-            from bookingapi.models import Booking     # moved here
-            from django.contrib.auth import get_user_model  # moved here
-            User = get_user_model()
+            frame = text_data if text_data is not None else bytes_data
+            # Plain {"message": ...} frames carry no type and count as chat messages
+            if await self.throttled(protocol.peek_type(frame) or "chat_message"):
+                return
+
+            data = protocol.decode(frame)
+            if data.get("type") == "read":
+                # No id reads everything so far; under write-behind live messages have none
+                message_id = data.get("message_id")
+                self.receipts.mark(None if message_id is None else int(message_id))
+                return
+
+            if data.get("type") == "typing":
+                if self.presence.typing_due():
+                    await self.channel_layer.group_send(self.room_group_name, {
+                        "type": "typing_event",
+                        "user_id": str(self.user.id),
+                        "name": self.user.name,
+                        "sender_channel": self.channel_name,
+                    })
+                return
 
-            data = json.loads(text_data)
             message = data.get("message")
-            sender_name = data.get("sender")
 
-            if not message or not sender_name:
-                print("⚠️ Missing message or sender")
+            if not message:
+                print("⚠️ Missing message")
                 return
 
-            booking = await self.get_booking(self.booking_id)
-            sender = await self.get_user_by_name(sender_name, User)
+            saved_msg = await store.record_message(self.booking_id, self.user, message)
 
-            if booking and sender:
-                saved_msg = await self.save_message(booking, sender, message)
+            await self.channel_layer.group_send(
+                self.room_group_name,
+                {
+                    "type": "chat_message",
+                    "id": saved_msg.id,
+                    "message": saved_msg.message,
+                    "sender": self.user.name,
+                    "timestamp": saved_msg.timestamp.isoformat(),
+                }
+            )
 
-                await self.channel_layer.group_send(
-                    self.room_group_name,
-                    {
-                        "type": "chat_message",
-                        "message": saved_msg.message,
-                        "sender": sender.name,
-                        "timestamp": saved_msg.timestamp.isoformat(),
-                    }
-                )
-            else:
-                print("❌ Booking or sender not found")
+            # The other participant is not in the room, so reach them wherever else they are
+            if not self.peer_present:
+                await notify_user(self.peer_user_id, "chat_preview", {
+                    "booking_id": self.booking_id, "sender_name": self.user.name, "message": message[:100],
+                })
 
         except Exception as e:
             print("🔥 Error in receive:", e)
 
+    async def throttled(self, message_type):
+        if self.limiter.allow(message_type):
+            return False
+        if self.limiter.should_close:
+            print(f"🚦 Closing flooding socket on {self.room_group_name}")
+            self.limiter.record_close()
+            await self.close(code=RATE_LIMIT_CLOSE_CODE)
+        return True
+
     async def chat_message(self, event):
-        await self.send(text_data=json.dumps({
+        await self.send(**protocol.encode({
+            "id": event["id"],
             "message": event["message"],
             "sender": event["sender"],
             "timestamp": event["timestamp"]
-        }))
+        }, self.binary))
 
-    @database_sync_to_async
-    def get_booking(self, booking_id):
-        from bookingapi.models import Booking  # moved here too
-        try:
-            return Booking.objects.filter(id=booking_id).first()
-        except Booking.DoesNotExist:
-            return None
+    async def broadcast_presence(self, status):
+        await self.channel_layer.group_send(self.room_group_name, {
+            "type": "presence_event",
+            "user_id": str(self.user.id),
+            "name": self.user.name,
+            "status": status,
+            "sender_channel": self.channel_name,
+        })
 
-    @database_sync_to_async
-    def get_user_by_name(self, name, User):
-        try:
-            return User.objects.filter(name=name).first()
-        except User.DoesNotExist:
-            return None
+    async def presence_event(self, event):
+        if event["user_id"] == str(self.peer_user_id):
+            self.peer_present = event["status"] == "joined"
+        if event["sender_channel"] != self.channel_name:
+            await self.send(**protocol.encode({
+                "type": "presence", "user_id": event["user_id"], "name": event["name"], "status": event["status"]
+            }, self.binary))
+
+    async def announce_read(self, message_id):
+        await self.channel_layer.group_send(self.room_group_name, {
+            "type": "read_receipt",
+            "user_id": str(self.user.id),
+            "message_id": message_id,
+            "sender_channel": self.channel_name,
+        })
+
+    async def read_receipt(self, event):
+        if event["sender_channel"] != self.channel_name:
+            await self.send(**protocol.encode({
+                "type": "read_receipt", "user_id": event["user_id"], "message_id": event["message_id"]
+            }, self.binary))
+
+    async def typing_event(self, event):
+        if event["sender_channel"] != self.channel_name:
+            await self.send(**protocol.encode({
+                "type": "typing", "user_id": event["user_id"], "name": event["name"]
+            }, self.binary))
+
+    async def user_notification(self, event):
+        await self.send(**protocol.encode({
+            "type": "notification", "kind": event["kind"], "payload": event["payload"]
+        }, self.binary))
 
     @database_sync_to_async
-    def save_message(self, booking, sender, message):
-        from chat.models import ChatMessage  # moved here too
-        return ChatMessage.objects.create(
-            booking=booking,
-            sender=sender,
-            message=message
-        )
+    def get_peer_user_id(self, booking_id, user):
+        from bookingapi.models import Booking
+        return Booking.objects.peer_user_id(booking_id, user)
+
+
+
+class NotificationConsumer(AsyncWebsocketConsumer):
+    """
+    A user's socket outside any booking room, e.g. for the dashboard. It only
+    receives `notification` frames: chat previews, call invites and the like.
+    """
+    async def connect(self):
+        self.user = self.scope['user']
+        self.binary = False
+
+        if not self.user.is_authenticated:
+            await self.close(code=4401)
+            return
+
+        await self.channel_layer.group_add(user_group(self.user.id), self.channel_name)
+        subprotocol = protocol.select_subprotocol(self.scope)
+        self.binary = subprotocol == protocol.MSGPACK_SUBPROTOCOL
+        await self.accept(subprotocol)
+
+    async def disconnect(self, close_code):
+        if self.user.is_authenticated:
+            await self.channel_layer.group_discard(user_group(self.user.id), self.channel_name)
+
+    async def receive(self, text_data=None, bytes_data=None):
+        # Nothing to receive; notifications only flow to the client
+        pass
+
+    async def user_notification(self, event):
+        await self.send(**protocol.encode({
+            "type": "notification", "kind": event["kind"], "payload": event["payload"]
+        }, self.binary))
@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from chat.archive import archive_booking, bookings_to_archive
+
+
+class Command(BaseCommand):
+    help = "Moves chat transcripts of long-finished bookings into compressed archive files."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.CHAT_ARCHIVE_AFTER_DAYS)
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        bookings = bookings_to_archive(options['days'])
+        if options['dry_run']:
+            self.stdout.write(f"{bookings.count()} bookings would be archived.")
+            return
+
+        archived = moved = 0
+        for booking in bookings.iterator():
+            count = archive_booking(booking, batch_size=options['batch_size'])
+            if count:
+                archived += 1
+                moved += count
+                self.stdout.write(f"Booking {booking.id}: archived {count} messages")
+        self.stdout.write(self.style.SUCCESS(f"Archived {moved} messages from {archived} bookings."))
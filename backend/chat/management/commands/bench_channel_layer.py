@@ -0,0 +1,112 @@
+import asyncio
+import time
+import uuid
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils.module_loading import import_string
+
+from videosession.management.commands.bench_signaling import ICE_CANDIDATE
+
+IN_MEMORY = 'channels.layers.InMemoryChannelLayer'
+REDIS = 'channels_redis.core.RedisChannelLayer'
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures group_send fan-out through the channel layer: the configured layer "
+        "and its stock-capacity equivalent, in memory and on Redis."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rooms', type=int, default=500)
+        parser.add_argument('--members', type=int, default=2, help="Channels in each room's group.")
+        parser.add_argument('--messages', type=int, default=20, help="group_sends per room, sent as one burst.")
+        parser.add_argument('--idle-timeout', type=float, default=2.0,
+                            help="Stop waiting once no message has arrived for this long.")
+
+    def handle(self, *args, **options):
+        configured = settings.CHANNEL_LAYERS['default']
+        redis = configured.get('CONFIG', {}) if configured['BACKEND'] == REDIS else {
+            'hosts': ['redis://localhost:6379'], **settings.CHANNEL_LAYER_CONFIG,
+        }
+        # flush() deletes every key under the layer's prefix, so never share the live one
+        prefix = f'bench_{uuid.uuid4().hex}'
+        configs = {
+            'memory, stock': (IN_MEMORY, {}),
+            'memory, settings': (IN_MEMORY, settings.CHANNEL_LAYER_CONFIG),
+            'redis x1, stock': (REDIS, {'hosts': redis['hosts'][:1], 'prefix': prefix}),
+            f"redis x{len(redis['hosts'])}, settings": (REDIS, {**redis, 'prefix': prefix}),
+        }
+        self.stdout.write(
+            f"{options['rooms']} rooms x {options['members']} members, "
+            f"{options['messages']} group_sends per room"
+        )
+        for label, (backend, config) in configs.items():
+            try:
+                layer = import_string(backend)(**config)
+                result = async_to_sync(self.run)(layer, options)
+            except Exception as e:
+                # channels_redis not installed, or no Redis listening
+                self.stdout.write(f"{label:<22} skipped: {e!r}")
+                continue
+            self.report(label, options, result)
+
+    async def run(self, layer, options):
+        rooms = [
+            [await layer.new_channel() for _ in range(options['members'])]
+            for _ in range(options['rooms'])
+        ]
+        for index, channels in enumerate(rooms):
+            for channel in channels:
+                await layer.group_add(f'bench_fanout_{index}', channel)
+
+        latencies = []
+
+        async def drain(channel):
+            while True:
+                message = await layer.receive(channel)
+                latencies.append(time.perf_counter() - message['sent'])
+
+        readers = [asyncio.ensure_future(drain(channel)) for channels in rooms for channel in channels]
+        try:
+            start = time.perf_counter()
+            for _ in range(options['messages']):
+                await asyncio.gather(*(
+                    layer.group_send(f'bench_fanout_{index}', {
+                        'type': 'ice_candidate', 'payload': ICE_CANDIDATE, 'sent': time.perf_counter(),
+                    })
+                    for index in range(len(rooms))
+                ))
+            sent = time.perf_counter() - start
+
+            # Full channels drop group messages silently, so wait for the traffic to stop
+            expected = len(rooms) * options['members'] * options['messages']
+            received, last_progress = 0, time.perf_counter()
+            while len(latencies) < expected and time.perf_counter() - last_progress < options['idle_timeout']:
+                await asyncio.sleep(0.01)
+                if len(latencies) > received:
+                    received, last_progress = len(latencies), time.perf_counter()
+            elapsed = (last_progress if len(latencies) < expected else time.perf_counter()) - start
+        finally:
+            for reader in readers:
+                reader.cancel()
+            await asyncio.gather(*readers, return_exceptions=True)
+            if hasattr(layer, 'flush'):
+                await layer.flush()
+        return {'sent': sent, 'elapsed': elapsed, 'expected': expected, 'latencies': sorted(latencies)}
+
+    def report(self, label, options, result):
+        latencies = result['latencies']
+        group_sends = options['rooms'] * options['messages']
+        if latencies:
+            p50 = latencies[len(latencies) // 2] * 1e3
+            p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1e3
+        else:
+            p50 = p99 = float('nan')
+        self.stdout.write(
+            f"{label:<22} {group_sends / result['sent']:>9.0f} group_send/s   "
+            f"{len(latencies) / result['elapsed']:>9.0f} deliveries/s   "
+            f"p50 {p50:>8.2f}ms  p99 {p99:>8.2f}ms   delivered {len(latencies)}/{result['expected']}"
+        )
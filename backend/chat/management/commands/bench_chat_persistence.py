@@ -0,0 +1,68 @@
+import time
+
+from asgiref.sync import async_to_sync
+from channels.db import database_sync_to_async
+from django.core.management.base import BaseCommand
+
+from advocateshub.benchutils import create_booking_fixture
+from chat.models import ChatMessage
+from chat.write_behind import WriteBehindBuffer
+
+
+class Command(BaseCommand):
+    help = "Compares per-message INSERTs with write-behind bulk_create for chat messages."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--messages', type=int, default=2000)
+        parser.add_argument('--batch-size', type=int, default=50)
+        parser.add_argument('--flush-interval', type=float, default=0.5)
+
+    def handle(self, *args, **options):
+        booking, users = create_booking_fixture()
+        try:
+            sender = booking.client.user
+            count = options['messages']
+
+            per_message = async_to_sync(self.run_per_message)(booking.id, sender, count)
+            buffer = WriteBehindBuffer(ChatMessage, options['batch_size'], options['flush_interval'])
+            batched = async_to_sync(self.run_write_behind)(buffer, booking.id, sender, count)
+
+            stored = ChatMessage.objects.filter(booking=booking).count()
+            self.report('per-message', count, per_message)
+            self.report(f"write-behind (batch={options['batch_size']})", count, batched)
+            self.stdout.write(f"speedup: {per_message['total'] / batched['total']:.1f}x, rows stored: {stored}")
+        finally:
+            for user in users:
+                user.delete()
+
+    async def run_per_message(self, booking_id, sender, count):
+        save = database_sync_to_async(ChatMessage.objects.create)
+        latencies = []
+        start = time.perf_counter()
+        for i in range(count):
+            t0 = time.perf_counter()
+            await save(booking_id=booking_id, sender=sender, sender_name=sender.name, message=f"per-message {i}")
+            latencies.append(time.perf_counter() - t0)
+        return {'total': time.perf_counter() - start, 'latencies': latencies}
+
+    async def run_write_behind(self, buffer, booking_id, sender, count):
+        latencies = []
+        start = time.perf_counter()
+        for i in range(count):
+            t0 = time.perf_counter()
+            buffer.add(ChatMessage(
+                booking_id=booking_id, sender=sender, sender_name=sender.name, message=f"write-behind {i}",
+            ))
+            latencies.append(time.perf_counter() - t0)
+        # Include the final flush so both runs end with every row committed
+        await buffer.flush()
+        return {'total': time.perf_counter() - start, 'latencies': latencies}
+
+    def report(self, label, count, result):
+        latencies = sorted(result['latencies'])
+        p50 = latencies[len(latencies) // 2] * 1e6
+        p99 = latencies[int(len(latencies) * 0.99)] * 1e6
+        self.stdout.write(
+            f"{label:<28} {count / result['total']:>10.0f} msg/s   "
+            f"receive-path p50 {p50:>8.1f}µs   p99 {p99:>8.1f}µs"
+        )
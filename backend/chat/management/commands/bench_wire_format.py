@@ -0,0 +1,67 @@
+import time
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from chat import protocol
+from videosession.management.commands.bench_signaling import ICE_CANDIDATE, SDP_OFFER
+
+
+class Command(BaseCommand):
+    help = "Compares JSON and MessagePack frames for typical signaling and chat traffic: bytes and encode/decode CPU."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20000)
+
+    def handle(self, *args, **options):
+        if protocol.msgpack is None:
+            raise CommandError("msgpack is not installed.")
+
+        chat = {
+            'id': 48213, 'text': "Please bring the signed agreement and both ID copies to the hearing.",
+            'senderId': '17', 'senderName': 'Bench Client', 'timestamp': datetime.now(),
+        }
+        samples = {
+            'offer': {'type': 'offer', 'payload': {'offer': {'type': 'offer', 'sdp': SDP_OFFER}, 'from': '17'}},
+            'ice_candidate': {'type': 'ice_candidate', 'payload': {'candidate': ICE_CANDIDATE}},
+            'chat_message': {'type': 'chat_message', 'payload': chat},
+            'chat_history': {'type': 'chat_history', 'payload': {'messages': [chat] * 100, 'has_more': True}},
+        }
+
+        iterations = options['iterations']
+        self.stdout.write(
+            f"{'frame':<14} {'json B':>8} {'msgpack B':>10} {'saved':>6}   "
+            f"{'json enc/dec µs':>16} {'msgpack enc/dec µs':>19}   {'peek µs json/msgpack':>20}"
+        )
+        for label, message in samples.items():
+            # chat_history is one frame per connect, not per message
+            count = iterations // 100 if label == 'chat_history' else iterations
+            text = protocol.encode(message)['text_data']
+            binary = protocol.encode(message, binary=True)['bytes_data']
+            json_enc, json_dec = self.time_codec(message, False, count)
+            pack_enc, pack_dec = self.time_codec(message, True, count)
+            self.stdout.write(
+                f"{label:<14} {len(text.encode()):>8} {len(binary):>10} {1 - len(binary) / len(text.encode()):>6.0%}   "
+                f"{json_enc:>7.2f} / {json_dec:>6.2f} {pack_enc:>9.2f} / {pack_dec:>7.2f}   "
+                f"{self.time_peek(text, count):>9.2f} / {self.time_peek(binary, count):>8.2f}"
+            )
+
+    def time_codec(self, message, binary, count):
+        start = time.process_time()
+        for _ in range(count):
+            frame = protocol.encode(message, binary)
+        encode = (time.process_time() - start) / count * 1e6
+
+        frame = frame['bytes_data'] if binary else frame['text_data']
+        start = time.process_time()
+        for _ in range(count):
+            protocol.decode(frame)
+        decode = (time.process_time() - start) / count * 1e6
+        return encode, decode
+
+    def time_peek(self, frame, count):
+        # The video consumer's per-frame cost on the signaling fast path
+        start = time.process_time()
+        for _ in range(count):
+            protocol.peek_type(frame)
+        return (time.process_time() - start) / count * 1e6
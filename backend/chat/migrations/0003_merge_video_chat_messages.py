@@ -0,0 +1,79 @@
+# Generated by Django 5.2.4 on 2026-10-19 18:58
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def merge_video_chat_messages(apps, schema_editor):
+    """
+    Copies videosession.ChatMessage rows into chat.ChatMessage.
+
+    Existing chat rows keep their ids (only their new sender_name is filled
+    in), so cursors clients already hold stay valid. Imported rows are appended after them, in timestamp order within
+    each booking; history is ordered by id, so a booking's imported video
+    messages read after its existing chat messages.
+    """
+    ChatMessage = apps.get_model('chat', 'ChatMessage')
+    VideoChatMessage = apps.get_model('videosession', 'ChatMessage')
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+
+    # Existing rows get the new sender_name filled in place
+    sender_ids = ChatMessage.objects.filter(sender__isnull=False).values_list('sender_id', flat=True).distinct()
+    for user_id, name in User.objects.filter(id__in=sender_ids).values_list('id', 'name'):
+        ChatMessage.objects.filter(sender_id=user_id).update(sender_name=name or '')
+
+    # Video rows stored the sender as a string; keep the FK only where it is a real user id
+    numeric_ids = {
+        int(sender_id) for sender_id in VideoChatMessage.objects.values_list('sender_id', flat=True).distinct()
+        if sender_id.isdigit()
+    }
+    known_user_ids = set(User.objects.filter(id__in=numeric_ids).values_list('id', flat=True))
+
+    rows = []
+    for msg in VideoChatMessage.objects.order_by('booking_id', 'timestamp', 'id').values(
+        'booking_id', 'sender_id', 'sender_name', 'text', 'timestamp'
+    ).iterator():
+        sender_id = int(msg['sender_id']) if msg['sender_id'].isdigit() else None
+        rows.append(ChatMessage(
+            booking_id=msg['booking_id'],
+            sender_id=sender_id if sender_id in known_user_ids else None,
+            sender_name=msg['sender_name'],
+            message=msg['text'],
+            timestamp=msg['timestamp'],
+        ))
+    ChatMessage.objects.bulk_create(rows, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookingapi', '0001_initial'),
+        ('chat', '0002_chatmessage_timestamp_default'),
+        ('videosession', '0002_chatmessage'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='chatmessage',
+            options={'ordering': ['id']},
+        ),
+        migrations.AddField(
+            model_name='chatmessage',
+            name='sender_name',
+            field=models.CharField(blank=True, default='', max_length=100),
+        ),
+        migrations.AlterField(
+            model_name='chatmessage',
+            name='sender',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='chatmessage',
+            index=models.Index(fields=['booking', 'id'], name='chat_chatme_booking_075e78_idx'),
+        ),
+        # Irreversible: imported rows are not told apart from chat rows, and
+        # videosession.ChatMessage is dropped in videosession 0003
+        migrations.RunPython(merge_video_chat_messages),
+    ]
@@ -0,0 +1,62 @@
+from django.db import migrations
+
+# Search backends differ per database, so neither index is part of the model state
+
+FTS_SQL = [
+    "CREATE VIRTUAL TABLE chat_chatmessage_fts USING fts5(message, content='chat_chatmessage', content_rowid='id')",
+    "INSERT INTO chat_chatmessage_fts(chat_chatmessage_fts) VALUES ('rebuild')",
+    """CREATE TRIGGER chat_chatmessage_fts_insert AFTER INSERT ON chat_chatmessage BEGIN
+        INSERT INTO chat_chatmessage_fts(rowid, message) VALUES (new.id, new.message);
+    END""",
+    """CREATE TRIGGER chat_chatmessage_fts_delete AFTER DELETE ON chat_chatmessage BEGIN
+        INSERT INTO chat_chatmessage_fts(chat_chatmessage_fts, rowid, message) VALUES ('delete', old.id, old.message);
+    END""",
+    """CREATE TRIGGER chat_chatmessage_fts_update AFTER UPDATE OF message ON chat_chatmessage BEGIN
+        INSERT INTO chat_chatmessage_fts(chat_chatmessage_fts, rowid, message) VALUES ('delete', old.id, old.message);
+        INSERT INTO chat_chatmessage_fts(rowid, message) VALUES (new.id, new.message);
+    END""",
+]
+FTS_DROP_SQL = [
+    "DROP TRIGGER IF EXISTS chat_chatmessage_fts_insert",
+    "DROP TRIGGER IF EXISTS chat_chatmessage_fts_delete",
+    "DROP TRIGGER IF EXISTS chat_chatmessage_fts_update",
+    "DROP TABLE IF EXISTS chat_chatmessage_fts",
+]
+
+
+def gin_index():
+    from django.contrib.postgres.indexes import GinIndex
+    from django.contrib.postgres.search import SearchVector
+    # Must stay identical to chat.search.message_search_vector() for queries to use it
+    return GinIndex(SearchVector('message', config='english'), name='chat_message_search_gin')
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.add_index(apps.get_model('chat', 'ChatMessage'), gin_index())
+    elif vendor == 'sqlite':
+        # Note: SQLite drops these triggers if a later migration rebuilds chat_chatmessage;
+        # such a migration must recreate them
+        for sql in FTS_SQL:
+            schema_editor.execute(sql)
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.remove_index(apps.get_model('chat', 'ChatMessage'), gin_index())
+    elif vendor == 'sqlite':
+        for sql in FTS_DROP_SQL:
+            schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0004_chatreadstate'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.4 on 2026-10-19 19:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookingapi', '0001_initial'),
+        ('chat', '0005_chatmessage_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChatArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file', models.FileField(upload_to='chat_archive/')),
+                ('message_count', models.PositiveIntegerField(default=0)),
+                ('last_message_id', models.PositiveBigIntegerField(default=0)),
+                ('archived_at', models.DateTimeField(auto_now=True)),
+                ('booking', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='chat_archive', to='bookingapi.booking')),
+            ],
+        ),
+    ]
@@ -1,15 +1,60 @@
 from django.db import models
+from django.utils import timezone
 from advocateshub.models import User
 from bookingapi.models import Booking
 
 class ChatMessage(models.Model):
+    """
+    The single message log for a booking, written by both the chat and the video
+    consumers. Read it through chat.store rather than querying it directly.
+    """
     booking = models.ForeignKey(Booking, on_delete=models.CASCADE, related_name="messages")
-    sender = models.ForeignKey(User, on_delete=models.CASCADE)
+    # Null only for legacy video-chat rows whose sender could not be resolved to a user
+    sender = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
+    # Denormalized so history reads never join the user table
+    sender_name = models.CharField(max_length=100, blank=True, default='')
     message = models.TextField()
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # Set when the message is received, so write-behind batches keep the broadcast time
+    timestamp = models.DateTimeField(default=timezone.now)
 
     class Meta:
-        ordering = ['timestamp']
+        ordering = ['id']
+        indexes = [
+            # History and resume queries are keyset scans on this index
+            models.Index(fields=['booking', 'id']),
+        ]
 
     def __str__(self):
-        return f'{self.sender.name}: {self.message[:30]}...'
+        return f'{self.sender_name}: {self.message[:30]}...'
+
+
+class ChatReadState(models.Model):
+    """How far a participant has read in a booking's chat, as the newest message id seen."""
+    booking = models.ForeignKey(Booking, on_delete=models.CASCADE, related_name="read_states")
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    last_read_id = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['booking', 'user'], name='unique_chat_read_state'),
+        ]
+
+    def __str__(self):
+        return f'{self.user_id} read booking {self.booking_id} up to {self.last_read_id}'
+
+
+class ChatArchive(models.Model):
+    """
+    A booking's transcript moved out of ChatMessage by the archive_chat job:
+    gzipped JSON lines, oldest message first, in the default file storage.
+    """
+    booking = models.OneToOneField(Booking, on_delete=models.CASCADE, related_name="chat_archive")
+    file = models.FileField(upload_to='chat_archive/')
+    message_count = models.PositiveIntegerField(default=0)
+    # Every message with an id up to this one is in the file
+    last_message_id = models.PositiveBigIntegerField(default=0)
+    archived_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'Archive of booking {self.booking_id} ({self.message_count} messages)'
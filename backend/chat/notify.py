@@ -0,0 +1,26 @@
+# chat/notify.py
+"""
+Delivery to a user rather than a booking room.
+
+Every authenticated WebSocket also joins its user's `user_<id>` group, so one
+group_send reaches each of that user's open tabs and devices without looking
+up their connections anywhere.
+"""
+from channels.layers import get_channel_layer
+
+
+def user_group(user_id):
+    return f'user_{user_id}'
+
+
+async def notify_user(user_id, kind, payload):
+    """
+    Sends a `notification` frame of the given kind to all of a user's open
+    sockets. Payload keys are snake_case, like the REST API, whichever socket
+    delivers them.
+    """
+    await get_channel_layer().group_send(user_group(user_id), {
+        'type': 'user_notification',
+        'kind': kind,
+        'payload': payload,
+    })
@@ -0,0 +1,18 @@
+# chat/pagination.py
+from advocateshub.pagination import IdKeysetPagination
+
+
+class ChatHistoryPagination(IdKeysetPagination):
+    """
+    A booking's messages, newest page first.
+
+    Each page is returned oldest-first for display; `next` points at the page of
+    older messages. Every page is a range scan on the (booking, id) index.
+    """
+    page_size = 50
+    # History pages read top to bottom, oldest first
+    oldest_first = True
+
+
+class ChatSearchPagination(IdKeysetPagination):
+    """Search hits, newest first; `next` continues with older matches."""
@@ -0,0 +1,83 @@
+# chat/presence.py
+"""
+Who is in a booking room and who is typing.
+
+Presence is a per-(room, user) connection count in the cache, so a user with
+two tabs open only "leaves" when the last one closes. While a connection is
+open, a timer in its worker refreshes the entry every PRESENCE_REFRESH
+seconds, idle or not; entries expire after PRESENCE_TTL without one, so a
+crashed worker cannot leave a ghost behind. Typing is never stored at all; each connection just
+forwards at most one typing event per TYPING_INTERVAL.
+
+The two participants of a room may be connected to different workers, so the
+cache has to be shared between them (settings.CACHES; check chat.W001 warns
+when the channel layer spans workers but the cache does not).
+"""
+import asyncio
+import time
+
+from django.core.cache import cache
+
+PRESENCE_TTL = 15 * 60
+PRESENCE_REFRESH = PRESENCE_TTL / 3
+TYPING_INTERVAL = 0.3
+
+
+def presence_key(room, user_id):
+    return f'presence:{room}:{user_id}'
+
+
+async def is_present(room, user_id):
+    return bool(await cache.aget(presence_key(room, user_id)))
+
+
+class Presence:
+    """One connection's share of a user's presence in a room."""
+
+    def __init__(self, room, user_id):
+        self.key = presence_key(room, user_id)
+        self.typed = 0.0
+        self.heartbeat = None
+
+    async def join(self):
+        """Counts this connection in; returns True if it is the user's first one in the room."""
+        await cache.aadd(self.key, 0, PRESENCE_TTL)
+        try:
+            count = await cache.aincr(self.key)
+        except ValueError:
+            # Expired between add and incr
+            await cache.aset(self.key, 1, PRESENCE_TTL)
+            count = 1
+        await cache.atouch(self.key, PRESENCE_TTL)
+        self.heartbeat = asyncio.ensure_future(self.keep_alive())
+        return count == 1
+
+    async def leave(self):
+        """Counts this connection out; returns True if the user has no connections left in the room."""
+        if self.heartbeat is not None:
+            self.heartbeat.cancel()
+            self.heartbeat = None
+        try:
+            count = await cache.adecr(self.key)
+        except ValueError:
+            return True
+        if count <= 0:
+            await cache.adelete(self.key)
+            return True
+        return False
+
+    async def keep_alive(self):
+        """Refreshes the entry for as long as the connection is open, whether or not it sends anything."""
+        while True:
+            await asyncio.sleep(PRESENCE_REFRESH)
+            if not await cache.atouch(self.key, PRESENCE_TTL):
+                # Evicted from the cache; count this connection back in
+                await cache.aadd(self.key, 1, PRESENCE_TTL)
+
+    def typing_due(self):
+        """True if a typing event should be forwarded now, coalescing the ones in between."""
+        now = time.monotonic()
+        if now - self.typed < TYPING_INTERVAL:
+            return False
+        self.typed = now
+        return True
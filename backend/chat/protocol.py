@@ -0,0 +1,70 @@
+# chat/protocol.py
+"""
+Wire formats for the chat and video WebSockets.
+
+JSON text frames are the default. A client that lists the "msgpack"
+subprotocol when it connects gets MessagePack binary frames in both
+directions instead, as long as msgpack is installed on the server.
+"""
+import json
+import re
+from datetime import datetime
+
+try:
+    import msgpack
+except ImportError:  # Optional: without it every socket speaks JSON
+    msgpack = None
+
+MSGPACK_SUBPROTOCOL = 'msgpack'
+
+_TYPE_PREFIX = re.compile(r'\s*\{\s*"type"\s*:\s*"(\w+)"')
+_MSGPACK_TYPE_KEY = b'\xa4type'
+
+
+def serialize_datetime(obj):
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    raise TypeError(f"Type {type(obj)} not serializable")
+
+
+def select_subprotocol(scope):
+    """
+    Returns the subprotocol to accept. msgpack wins when the client offers it;
+    browsers only require that the accepted protocol is one they offered, so
+    it can stand in for the "access_token" auth subprotocol too.
+    """
+    if msgpack is not None and MSGPACK_SUBPROTOCOL in (scope.get('subprotocols') or []):
+        return MSGPACK_SUBPROTOCOL
+    return scope.get('auth_subprotocol')
+
+
+def peek_type(frame):
+    """Reads the message type from a frame that starts with its "type" key, without parsing the rest."""
+    if isinstance(frame, bytes):
+        # MessagePack: fixmap header, the fixstr "type", then a fixstr value
+        if len(frame) > 6 and 0x80 <= frame[0] <= 0x8f and frame[1:6] == _MSGPACK_TYPE_KEY and 0xa0 <= frame[6] <= 0xbf:
+            return frame[7:7 + frame[6] - 0xa0].decode(errors='replace')
+        return None
+    match = _TYPE_PREFIX.match(frame)
+    return match.group(1) if match else None
+
+
+def decode(frame):
+    """Decodes a text (JSON) or binary (MessagePack) frame."""
+    if isinstance(frame, bytes):
+        if msgpack is None:
+            raise ValueError("Binary frame received but msgpack is not installed")
+        return msgpack.unpackb(frame)
+    return json.loads(frame)
+
+
+def encode(obj, binary=False):
+    """Returns the keyword arguments for consumer.send() in the negotiated format."""
+    if binary:
+        return {'bytes_data': msgpack.packb(obj, default=serialize_datetime)}
+    return {'text_data': json.dumps(obj, default=serialize_datetime)}
+
+
+def frame_kwargs(frame):
+    """Returns the keyword arguments for sending an already encoded frame unchanged."""
+    return {'bytes_data': frame} if isinstance(frame, bytes) else {'text_data': frame}
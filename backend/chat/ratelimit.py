@@ -0,0 +1,100 @@
+# chat/ratelimit.py
+"""
+Inbound rate limiting for the chat and video WebSockets.
+
+Every connection gets its own token bucket per message type, sized by
+settings.WS_RATE_LIMITS. Frames over the limit are dropped; a client that
+keeps flooding is closed with RATE_LIMIT_CLOSE_CODE. Drops and closes are
+counted per room in this process so hot rooms show up in the stats API.
+"""
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+# Application close code, mirroring HTTP 429 Too Many Requests
+RATE_LIMIT_CLOSE_CODE = 4429
+
+# Rooms whose counters are kept; the least recently throttled room is forgotten first
+MAX_TRACKED_ROOMS = 1000
+
+# room group name -> {'dropped': n, 'closed': n}, for this worker process only,
+# least recently throttled first
+backpressure = OrderedDict()
+
+
+def _count(room, counter):
+    counts = backpressure.get(room)
+    if counts is None:
+        counts = backpressure[room] = {'dropped': 0, 'closed': 0}
+        if len(backpressure) > MAX_TRACKED_ROOMS:
+            backpressure.popitem(last=False)
+    else:
+        backpressure.move_to_end(room)
+    counts[counter] += 1
+
+
+class TokenBucket:
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated')
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def consume(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+class ConnectionLimiter:
+    """
+    Limits one socket's inbound frames. `allow()` returns False for a frame
+    that should be dropped; `should_close` turns True once
+    WS_RATE_LIMIT_CLOSE_AFTER frames in a row have been dropped.
+    """
+
+    def __init__(self, room):
+        self.room = room
+        self.limits = settings.WS_RATE_LIMITS
+        self.buckets = {}
+        self.consecutive_drops = 0
+        self.closed = False
+
+    def allow(self, message_type):
+        if self.closed:
+            return False
+
+        # Unknown types share one bucket, so clients cannot mint new ones
+        key = message_type if message_type in self.limits else 'default'
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = TokenBucket(*self.limits[key])
+
+        if bucket.consume():
+            self.consecutive_drops = 0
+            return True
+
+        self.consecutive_drops += 1
+        _count(self.room, 'dropped')
+        return False
+
+    @property
+    def should_close(self):
+        return not self.closed and self.consecutive_drops >= settings.WS_RATE_LIMIT_CLOSE_AFTER
+
+    def record_close(self):
+        self.closed = True
+        _count(self.room, 'closed')
+
+
+def backpressure_stats():
+    """Rooms that have dropped frames in this process (up to MAX_TRACKED_ROOMS), hottest first."""
+    rooms = [{'room': room, **counts} for room, counts in backpressure.items()]
+    return sorted(rooms, key=lambda row: row['dropped'], reverse=True)
@@ -0,0 +1,66 @@
+# chat/receipts.py
+"""
+Read receipts from a chat or video socket.
+
+Clients report the newest message id they have displayed as often as they
+like, or no id to mean everything so far (the only option under write-behind,
+where live messages have none). Each connection saves and announces its read position at most once per
+READ_RECEIPT_INTERVAL: the first report goes out at once, later ones are
+folded into a single trailing update.
+"""
+import asyncio
+import time
+
+from chat import store
+
+READ_RECEIPT_INTERVAL = 2.0
+
+
+class ReadReceipts:
+    def __init__(self, booking_id, user, announce):
+        self.booking_id = booking_id
+        self.user = user
+        # Coroutine called with the saved message id, e.g. to tell the room
+        self.announce = announce
+        self.saved = 0
+        self.pending = 0
+        # A report without an id is waiting: read up to the newest stored message
+        self.pending_latest = False
+        self.flushed_at = 0.0
+        self.task = None
+
+    def mark(self, message_id=None):
+        if message_id is None:
+            self.pending_latest = True
+        elif message_id <= max(self.saved, self.pending):
+            return
+        else:
+            self.pending = message_id
+        if self.task is None:
+            delay = max(0.0, self.flushed_at + READ_RECEIPT_INTERVAL - time.monotonic())
+            self.task = asyncio.get_running_loop().create_task(self.flush_after(delay))
+
+    async def flush_after(self, delay):
+        if delay:
+            await asyncio.sleep(delay)
+        self.task = None
+        await self.flush()
+
+    async def flush(self):
+        if self.pending <= self.saved and not self.pending_latest:
+            return
+        requested = None if self.pending_latest else self.pending
+        self.saved = max(self.saved, self.pending)
+        self.pending_latest = False
+        self.flushed_at = time.monotonic()
+        message_id = await store.mark_read(self.booking_id, self.user, requested)
+        if message_id:
+            self.saved = max(self.saved, message_id)
+            await self.announce(message_id)
+
+    async def close(self):
+        """Saves any pending position right away, e.g. when the socket disconnects."""
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+        await self.flush()
@@ -2,5 +2,6 @@ from django.urls import path
 from . import consumers
 
 websocket_urlpatterns = [
-    path("ws/chat/<str:booking_id>/", consumers.ChatConsumer.as_asgi()),
+    path("ws/chat/<int:booking_id>/", consumers.ChatConsumer.as_asgi()),
+    path("ws/notifications/", consumers.NotificationConsumer.as_asgi()),
 ]
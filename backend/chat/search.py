@@ -0,0 +1,69 @@
+# chat/search.py
+"""
+Full-text search over chat messages.
+
+On PostgreSQL messages are matched against a GIN index on
+to_tsvector('english', message); on SQLite against the FTS5 table
+chat_chatmessage_fts. Both are created by migration 0005 and kept up to date
+by the database itself on every insert, so there is nothing to reindex.
+"""
+from django.db import connection
+from django.db.models.expressions import RawSQL
+
+from bookingapi.models import Booking
+from chat.models import ChatMessage
+
+SEARCH_CONFIG = 'english'
+FTS_TABLE = 'chat_chatmessage_fts'
+# Matched terms in snippets are wrapped in these; the snippet is otherwise plain text
+HIGHLIGHT_START = '**'
+HIGHLIGHT_STOP = '**'
+
+
+def message_search_vector():
+    from django.contrib.postgres.search import SearchVector
+    return SearchVector('message', config=SEARCH_CONFIG)
+
+
+def search_messages(user, text, booking_id=None):
+    """
+    Messages matching `text` in the bookings `user` takes part in (or just
+    `booking_id`), each annotated with a highlighted `snippet`.
+    """
+    messages = ChatMessage.objects.filter(booking__in=Booking.objects.for_participant(user).values('id'))
+    if booking_id is not None:
+        messages = messages.filter(booking_id=booking_id)
+
+    if connection.vendor == 'postgresql':
+        return _search_postgres(messages, text)
+    return _search_sqlite(messages, text)
+
+
+def _search_postgres(messages, text):
+    from django.contrib.postgres.search import SearchHeadline, SearchQuery
+
+    query = SearchQuery(text, config=SEARCH_CONFIG, search_type='websearch')
+    return (
+        messages
+        # Same expression as the GIN index, so the planner can use it
+        .annotate(search=message_search_vector())
+        .filter(search=query)
+        .annotate(snippet=SearchHeadline(
+            'message', query, config=SEARCH_CONFIG,
+            start_sel=HIGHLIGHT_START, stop_sel=HIGHLIGHT_STOP, max_words=24, min_words=8,
+        ))
+    )
+
+
+def _search_sqlite(messages, text):
+    # Quote every term so user input is never read as FTS5 query syntax
+    match = ' '.join('"{}"'.format(term.replace('"', '""')) for term in text.split())
+    return (
+        messages
+        .filter(id__in=RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [match]))
+        .annotate(snippet=RawSQL(
+            f"SELECT snippet({FTS_TABLE}, 0, %s, %s, '…', 16) FROM {FTS_TABLE} "
+            f"WHERE {FTS_TABLE} MATCH %s AND rowid = chat_chatmessage.id",
+            [HIGHLIGHT_START, HIGHLIGHT_STOP, match],
+        ))
+    )
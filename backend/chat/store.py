@@ -0,0 +1,134 @@
+# chat/store.py
+"""
+Storage for booking chat messages.
+
+Every read and write of chat.ChatMessage goes through here, whether it comes
+from the chat socket, the video socket or the history API.
+
+Under CHAT_WRITE_BEHIND a message is broadcast before it has an id, so nothing
+live can be keyed on ids: read receipts without an id mark everything stored
+so far as read, and sockets ignore `since` and replay full history, whose
+messages do carry ids (see resume_supported()).
+"""
+from channels.db import database_sync_to_async
+from django.conf import settings
+from django.db.models import Count, FilteredRelation, Max, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from bookingapi.models import Booking
+from chat.archive import archived_messages
+from chat.models import ChatArchive, ChatMessage, ChatReadState
+from chat.write_behind import get_buffer
+
+# Most messages replayed on socket connect; older ones are paged in over the history API
+HISTORY_LIMIT = 100
+
+
+async def record_message(booking_id, sender, text):
+    """
+    Stores a message from `sender` and returns it. Under CHAT_WRITE_BEHIND the row
+    is only queued, so its id stays None until the buffer is flushed.
+    """
+    msg = ChatMessage(booking_id=booking_id, sender=sender, sender_name=sender.name, message=text)
+    if settings.CHAT_WRITE_BEHIND:
+        get_buffer(ChatMessage).add(msg)
+    else:
+        await database_sync_to_async(msg.save)()
+    return msg
+
+
+def resume_supported():
+    """Whether clients can resume from a message id; live messages only have ids without write-behind."""
+    return not settings.CHAT_WRITE_BEHIND
+
+
+async def flush():
+    """Persists any write-behind messages still buffered in this process."""
+    if settings.CHAT_WRITE_BEHIND:
+        await get_buffer(ChatMessage).flush()
+
+
+def history_queryset(booking_id):
+    return ChatMessage.objects.filter(booking_id=booking_id)
+
+
+def newest_messages(booking_id, limit, before=None, since=None):
+    """
+    Up to `limit` messages, newest first, with ids below `before` and above
+    `since` when given. Once the table runs out, continues into the booking's
+    archived transcript, so callers never need to know what was archived.
+    """
+    messages = history_queryset(booking_id)
+    if before is not None:
+        messages = messages.filter(id__lt=before)
+    if since is not None:
+        messages = messages.filter(id__gt=since)
+    rows = list(messages.order_by('-id')[:limit])
+
+    if len(rows) < limit:
+        archive = ChatArchive.objects.filter(booking_id=booking_id).first()
+        if archive is not None:
+            # Archived ids are all older than the rows still in the table
+            floor = rows[-1].id if rows else before
+            older = [
+                msg for msg in reversed(archived_messages(archive))
+                if (floor is None or msg.id < floor) and (since is None or msg.id > since)
+            ]
+            rows += older[:limit - len(rows)]
+    return rows
+
+
+@database_sync_to_async
+def recent_messages(booking_id, since=None, limit=HISTORY_LIMIT):
+    """
+    Returns up to `limit` of the newest messages (after message id `since`, if
+    given), oldest first, plus whether older unsent messages remain.
+    """
+    rows = newest_messages(booking_id, limit + 1, since=since)
+    return rows[:limit][::-1], len(rows) > limit
+
+
+@database_sync_to_async
+def mark_read(booking_id, user, message_id):
+    """
+    Moves the user's read position forward to `message_id`, or to the newest
+    stored message when it is None; it never moves back. Ids past the
+    booking's newest message are clamped to it, so a bad frame cannot mark
+    messages that do not exist yet as read. Returns the id marked, or None.
+    """
+    newest = ChatMessage.objects.filter(booking_id=booking_id).aggregate(newest=Max('id'))['newest'] or 0
+    message_id = newest if message_id is None else min(message_id, newest)
+    if message_id <= 0:
+        return None
+    updated = ChatReadState.objects.filter(
+        booking_id=booking_id, user=user, last_read_id__lt=message_id,
+    ).update(last_read_id=message_id)
+    if not updated:
+        ChatReadState.objects.get_or_create(booking_id=booking_id, user=user, defaults={'last_read_id': message_id})
+    return message_id
+
+
+def unread_counts(user):
+    """
+    Returns {booking id: unread count} over all of the user's bookings in one
+    query, counting messages from the other participant newer than the user's
+    read position. The read position is joined per booking first, so each
+    count is a range scan on the (booking, id) index starting just past it.
+    """
+    unread = (
+        ChatMessage.objects
+        .filter(booking=OuterRef('pk'), id__gt=OuterRef('last_read_id'))
+        .exclude(sender=user)
+        .order_by()
+        .values('booking')
+        .annotate(count=Count('id'))
+        .values('count')
+    )
+    rows = (
+        Booking.objects.for_participant(user)
+        .annotate(read_state=FilteredRelation('read_states', condition=Q(read_states__user=user)))
+        .annotate(last_read_id=Coalesce('read_state__last_read_id', 0))
+        .annotate(unread=Subquery(unread))
+        .values_list('id', 'unread')
+    )
+    return {booking_id: unread for booking_id, unread in rows if unread}
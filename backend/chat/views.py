@@ -1,13 +1,77 @@
-# from rest_framework.views import APIView
-# from rest_framework.response import Response
-# from rest_framework.permissions import IsAuthenticated
-# from .models import ChatMessage
-# from advocatehub.serializers import ChatMessageSerializer
-
-# class ChatHistoryAPI(APIView):
-#     permission_classes = [IsAuthenticated]
-
-#     def get(self, request, booking_id):
-#         messages = ChatMessage.objects.filter(booking__id=booking_id)
-#         serializer = ChatMessageSerializer(messages, many=True)
-#         return Response(serializer.data)
+from rest_framework.views import APIView
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
+from rest_framework.response import Response
+from rest_framework import status
+
+from bookingapi.models import Booking
+from advocateshub.serializers import ChatMessageSerializer, ChatSearchHitSerializer
+from . import store
+from .pagination import ChatHistoryPagination, ChatSearchPagination
+from .search import search_messages
+from .ratelimit import backpressure_stats
+
+
+class ChatHistoryAPI(APIView):
+    """
+    Pages backwards through a booking's chat history, newest first.
+    Pass the `next` link (?before=<message id>) to load older messages.
+    """
+    permission_classes = [IsAuthenticated]
+    pagination_class = ChatHistoryPagination
+
+    def get(self, request, booking_id):
+        booking = Booking.objects.filter(id=booking_id).values('client__user_id', 'lawyer__user_id').first()
+        if booking is None:
+            return Response({"detail": "Booking not found."}, status=status.HTTP_404_NOT_FOUND)
+
+        if request.user.id not in (booking['client__user_id'], booking['lawyer__user_id']):
+            return Response({"detail": "Access denied."}, status=status.HTTP_403_FORBIDDEN)
+
+        paginator = self.pagination_class()
+        messages = paginator.paginate_rows(
+            lambda before, count: store.newest_messages(booking_id, count, before=before), request,
+        )
+        serializer = ChatMessageSerializer(messages, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+
+class BackpressureStatsAPI(APIView):
+    """
+    Frames dropped and sockets closed by the WebSocket rate limiter, per room.
+    Counters live in each worker process and reset when it restarts.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(backpressure_stats())
+
+
+class UnreadCountsAPI(APIView):
+    """Unread chat messages per booking for the current user; bookings with none are omitted."""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        return Response(store.unread_counts(request.user))
+
+
+class ChatSearchAPI(APIView):
+    """
+    Full-text search over the chat of every booking the user is part of.
+    ?q=<terms> is required; ?booking=<id> narrows it to one consultation.
+    """
+    permission_classes = [IsAuthenticated]
+    pagination_class = ChatSearchPagination
+
+    def get(self, request):
+        text = request.query_params.get('q', '').strip()
+        if not text:
+            return Response({"detail": "Query parameter 'q' is required."}, status=status.HTTP_400_BAD_REQUEST)
+
+        booking_id = request.query_params.get('booking')
+        if booking_id is not None and not booking_id.isdigit():
+            return Response({"detail": "Invalid booking id."}, status=status.HTTP_400_BAD_REQUEST)
+
+        paginator = self.pagination_class()
+        hits = paginator.paginate_queryset(search_messages(request.user, text, booking_id), request, view=self)
+        serializer = ChatSearchHitSerializer(hits, many=True)
+        return paginator.get_paginated_response(serializer.data)
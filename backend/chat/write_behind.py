@@ -0,0 +1,132 @@
+# chat/write_behind.py
+import asyncio
+import atexit
+import logging
+import threading
+
+from channels.db import database_sync_to_async
+from django.conf import settings
+from django.db import InterfaceError, OperationalError, transaction
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindBuffer:
+    """
+    Per-process buffer of unsaved model instances.
+
+    Consumers add() messages after broadcasting them; the buffer persists them with
+    a single bulk_create once `batch_size` rows are pending or `flush_interval`
+    seconds have passed, whichever comes first. If the database is unavailable
+    the batch goes back on the buffer and is retried after `flush_interval`.
+    """
+
+    def __init__(self, model, batch_size, flush_interval):
+        self.model = model
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._pending = []
+        self._timer = None
+        self._lock = threading.Lock()
+        # The event loop only keeps weak references to tasks
+        self._tasks = set()
+
+    def add(self, instance):
+        with self._lock:
+            self._pending.append(instance)
+            pending = len(self._pending)
+
+        loop = asyncio.get_running_loop()
+        if pending >= self.batch_size:
+            self._spawn_flush(loop)
+        elif self._timer is None:
+            self._timer = loop.call_later(self.flush_interval, self._spawn_flush, loop)
+
+    def _spawn_flush(self, loop):
+        task = loop.create_task(self.flush())
+        self._tasks.add(task)
+        task.add_done_callback(self._flush_done)
+
+    def _flush_done(self, task):
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"❌ [WriteBehind] {self.model.__name__} flush failed", exc_info=task.exception())
+
+    async def flush(self):
+        batch = self._take()
+        unsaved = await database_sync_to_async(self._write)(batch) if batch else []
+        if unsaved:
+            self._requeue(unsaved)
+
+    def flush_sync(self):
+        batch = self._take()
+        unsaved = self._write(batch) if batch else []
+        if unsaved:
+            logger.error(f"❌ [WriteBehind] Database unavailable at shutdown; lost {len(unsaved)} {self.model.__name__} rows")
+
+    def _requeue(self, batch):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            # Ahead of anything added meanwhile, so rows still save in order
+            self._pending[:0] = batch
+            if self._timer is None:
+                self._timer = loop.call_later(self.flush_interval, self._spawn_flush, loop)
+
+    def _take(self):
+        with self._lock:
+            batch, self._pending = self._pending, []
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        return batch
+
+    def _write(self, batch):
+        """Saves the batch; returns the rows left unsaved because the database was unavailable."""
+        name = self.model.__name__
+        try:
+            self.model.objects.bulk_create(batch, batch_size=self.batch_size)
+            return []
+        except (OperationalError, InterfaceError) as e:
+            logger.warning(f"⚠️ [WriteBehind] Database unavailable, retrying {len(batch)} {name} rows: {e}")
+            return batch
+        except Exception as e:
+            logger.warning(f"⚠️ [WriteBehind] Batch of {len(batch)} {name} rows failed, saving them one by one: {e}")
+
+        # A row the database rejects (e.g. its session was deleted) must not take the rest of the batch with it
+        for index, instance in enumerate(batch):
+            try:
+                with transaction.atomic():
+                    self.model.objects.bulk_create([instance])
+            except (OperationalError, InterfaceError) as e:
+                logger.warning(f"⚠️ [WriteBehind] Database unavailable, retrying {len(batch) - index} {name} rows: {e}")
+                return batch[index:]
+            except Exception as e:
+                logger.error(f"❌ [WriteBehind] Dropped {name} row the database rejected: {e}", exc_info=True)
+        return []
+
+
+_buffers = {}
+
+
+def get_buffer(model):
+    """Returns the process-wide buffer for `model`, creating it on first use."""
+    if model not in _buffers:
+        _buffers[model] = WriteBehindBuffer(
+            model,
+            batch_size=settings.CHAT_WRITE_BEHIND_BATCH_SIZE,
+            flush_interval=settings.CHAT_WRITE_BEHIND_FLUSH_INTERVAL,
+        )
+    return _buffers[model]
+
+
+async def flush_all():
+    """Persists everything buffered in this process, for every model."""
+    for buffer in list(_buffers.values()):
+        await buffer.flush()
+
+
+@atexit.register
+def _flush_on_shutdown():
+    # The event loop is gone by now, so write synchronously
+    for buffer in list(_buffers.values()):
+        buffer.flush_sync()
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from lawyerapi.ratings import recompute
+
+
+class Command(BaseCommand):
+    help = "Recomputes every lawyer's rating aggregates from their reviews and fixes any that drifted."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        fixed = recompute(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Fixed rating aggregates for {fixed} lawyers."))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from lawyerapi.ranking import renormalize
+
+
+class Command(BaseCommand):
+    help = (
+        "Rescores every lawyer's search ranking against the current site-wide mean rating and "
+        "booking recency. Run it periodically (e.g. nightly)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        changed = renormalize(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Rescored {changed} lawyers."))
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.4 on 2026-10-19 19:37
+
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import Coalesce
+
+
+def backfill_rating_sum(apps, schema_editor):
+    """Sets rating_sum, and recounts review_count and average_rating, from the existing reviews."""
+    Lawyer = apps.get_model('lawyerapi', 'Lawyer')
+    lawyers = []
+    for lawyer in Lawyer.objects.annotate(actual_count=Count('reviews'), actual_sum=Coalesce(Sum('reviews__rating'), 0)):
+        lawyer.review_count = lawyer.actual_count
+        lawyer.rating_sum = lawyer.actual_sum
+        lawyer.average_rating = (
+            (Decimal(lawyer.actual_sum) / lawyer.actual_count).quantize(Decimal('0.01'), ROUND_HALF_UP)
+            if lawyer.actual_count else Decimal('0.00')
+        )
+        lawyers.append(lawyer)
+    Lawyer.objects.bulk_update(lawyers, ['review_count', 'rating_sum', 'average_rating'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lawyerapi', '0002_lawyer_average_rating_lawyer_review_count'),
+        ('reviews', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lawyer',
+            name='rating_sum',
+            field=models.IntegerField(default=0, help_text='Sum of all review ratings; average_rating is rating_sum / review_count.'),
+        ),
+        migrations.RunPython(backfill_rating_sum, migrations.RunPython.noop),
+    ]
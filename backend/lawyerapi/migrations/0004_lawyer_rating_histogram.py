@@ -0,0 +1,53 @@
+# Generated by Django 5.2.4 on 2026-10-19 19:38
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def backfill_rating_histogram(apps, schema_editor):
+    Lawyer = apps.get_model('lawyerapi', 'Lawyer')
+    fields = [f'rating_{stars}_count' for stars in range(1, 6)]
+    lawyers = list(Lawyer.objects.annotate(**{
+        f'actual_{field}': Count('reviews', filter=Q(reviews__rating=stars))
+        for stars, field in enumerate(fields, start=1)
+    }))
+    for lawyer in lawyers:
+        for field in fields:
+            setattr(lawyer, field, getattr(lawyer, f'actual_{field}'))
+    Lawyer.objects.bulk_update(lawyers, fields, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lawyerapi', '0003_lawyer_rating_sum'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lawyer',
+            name='rating_1_count',
+            field=models.IntegerField(default=0, help_text='Number of 1-star reviews.'),
+        ),
+        migrations.AddField(
+            model_name='lawyer',
+            name='rating_2_count',
+            field=models.IntegerField(default=0, help_text='Number of 2-star reviews.'),
+        ),
+        migrations.AddField(
+            model_name='lawyer',
+            name='rating_3_count',
+            field=models.IntegerField(default=0, help_text='Number of 3-star reviews.'),
+        ),
+        migrations.AddField(
+            model_name='lawyer',
+            name='rating_4_count',
+            field=models.IntegerField(default=0, help_text='Number of 4-star reviews.'),
+        ),
+        migrations.AddField(
+            model_name='lawyer',
+            name='rating_5_count',
+            field=models.IntegerField(default=0, help_text='Number of 5-star reviews.'),
+        ),
+        migrations.RunPython(backfill_rating_histogram, migrations.RunPython.noop),
+    ]
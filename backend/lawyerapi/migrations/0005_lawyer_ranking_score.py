@@ -0,0 +1,79 @@
+# Generated by Django 5.2.4 on 2026-10-19 19:41
+
+import re
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Max, Sum
+from django.utils import timezone
+
+# The scoring as it stood when this migration was written (lawyerapi.ranking),
+# copied so later changes there do not alter what this migration does
+PRIOR_WEIGHT = 10
+DEFAULT_PRIOR_MEAN = 3.0
+RATING_WEIGHT = 0.8
+EXPERIENCE_WEIGHT = 0.1
+RECENCY_WEIGHT = 0.1
+MAX_EXPERIENCE_YEARS = 30
+RECENCY_HALF_LIFE_DAYS = 30
+
+
+def compute_score(rating_sum, review_count, experience, last_booked_at, prior_mean, now):
+    bayesian = (PRIOR_WEIGHT * prior_mean + rating_sum) / (PRIOR_WEIGHT + review_count)
+    match = re.search(r'\d+', experience or '')
+    years = min(int(match.group()) if match else 0, MAX_EXPERIENCE_YEARS)
+    recency = 0.0
+    if last_booked_at is not None:
+        days = max((now - last_booked_at).total_seconds(), 0) / 86400
+        recency = 0.5 ** (days / RECENCY_HALF_LIFE_DAYS)
+    return (
+        RATING_WEIGHT * bayesian / 5
+        + EXPERIENCE_WEIGHT * years / MAX_EXPERIENCE_YEARS
+        + RECENCY_WEIGHT * recency
+    )
+
+
+def backfill_ranking_score(apps, schema_editor):
+    Lawyer = apps.get_model('lawyerapi', 'Lawyer')
+    Booking = apps.get_model('bookingapi', 'Booking')
+    totals = Lawyer.objects.aggregate(ratings=Sum('rating_sum'), reviews=Sum('review_count'))
+    mean = totals['ratings'] / totals['reviews'] if totals['reviews'] else DEFAULT_PRIOR_MEAN
+    last_booked = dict(
+        Booking.objects.exclude(status='rejected').values('lawyer_id')
+        .annotate(last=Max('created_at')).order_by().values_list('lawyer_id', 'last')
+    )
+    now = timezone.now()
+    lawyers = list(Lawyer.objects.all())
+    for lawyer in lawyers:
+        lawyer.last_booked_at = last_booked.get(lawyer.id)
+        lawyer.ranking_score = compute_score(
+            lawyer.rating_sum, lawyer.review_count, lawyer.experience, lawyer.last_booked_at, mean, now,
+        )
+    Lawyer.objects.bulk_update(lawyers, ['last_booked_at', 'ranking_score'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lawyerapi', '0004_lawyer_rating_histogram'),
+        ('bookingapi', '0002_booking_twilio_channel_sid'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lawyer',
+            name='last_booked_at',
+            field=models.DateTimeField(blank=True, help_text="When this lawyer's most recent booking was made.", null=True),
+        ),
+        migrations.AddField(
+            model_name='lawyer',
+            name='ranking_score',
+            field=models.FloatField(default=0.0, help_text='Search rank: Bayesian average rating blended with experience and booking recency (lawyerapi.ranking).'),
+        ),
+        migrations.AddIndex(
+            model_name='lawyer',
+            index=models.Index(fields=['profile_status', '-ranking_score', 'id'], name='lawyer_ranking'),
+        ),
+        migrations.RunPython(backfill_ranking_score, migrations.RunPython.noop),
+    ]
@@ -2,7 +2,10 @@
 # ✅ lawyerapi/models.py
 from django.db import models
 from advocateshub.models import User
-from django.db.models import Avg, Count 
+from django.db.models import Avg, Count, Q, Sum
+
+# Lawyer's per-star review counters, 1 to 5 stars
+HISTOGRAM_FIELDS = [f'rating_{stars}_count' for stars in range(1, 6)]
 
 class Lawyer(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
@@ -34,20 +37,58 @@ class Lawyer(models.Model):
         default=0, 
         help_text="Total number of reviews received."
     )
+    rating_sum = models.IntegerField(
+        default=0,
+        help_text="Sum of all review ratings; average_rating is rating_sum / review_count."
+    )
+    rating_1_count = models.IntegerField(default=0, help_text="Number of 1-star reviews.")
+    rating_2_count = models.IntegerField(default=0, help_text="Number of 2-star reviews.")
+    rating_3_count = models.IntegerField(default=0, help_text="Number of 3-star reviews.")
+    rating_4_count = models.IntegerField(default=0, help_text="Number of 4-star reviews.")
+    rating_5_count = models.IntegerField(default=0, help_text="Number of 5-star reviews.")
+    last_booked_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="When this lawyer's most recent booking was made."
+    )
+    ranking_score = models.FloatField(
+        default=0.0,
+        help_text="Search rank: Bayesian average rating blended with experience and booking recency (lawyerapi.ranking)."
+    )
+
+    class Meta:
+        indexes = [
+            # Search lists approved lawyers best-ranked first
+            models.Index(fields=['profile_status', '-ranking_score', 'id'], name='lawyer_ranking'),
+        ]
 
-    
     def __str__(self):
         return f"Lawyer: {self.user.username}"
     
     
+    @property
+    def rating_histogram(self):
+        """Review count per star rating, {1: n, ..., 5: n}."""
+        return {stars: getattr(self, f'rating_{stars}_count') for stars in range(1, 6)}
+
     def update_average_rating(self):
+        """
+        Recounts this lawyer's rating fields from their reviews. Review writes
+        keep them current incrementally (lawyerapi.ratings); this is for repair.
+        """
         from reviews.models import Review 
         # Aggregate reviews for this lawyer
         stats = Review.objects.filter(lawyer=self).aggregate(
             avg_rating=Avg('rating'),
-            count_reviews=Count('id')
+            count_reviews=Count('id'),
+            sum_ratings=Sum('rating'),
+            **{f'stars_{stars}': Count('id', filter=Q(rating=stars)) for stars in range(1, 6)},
         )
         
         self.average_rating = stats['avg_rating'] if stats['avg_rating'] is not None else 0.00
         self.review_count = stats['count_reviews'] if stats['count_reviews'] is not None else 0
-        self.save(update_fields=['average_rating', 'review_count']) # Save only these fields
+        self.rating_sum = stats['sum_ratings'] or 0
+        for stars in range(1, 6):
+            setattr(self, f'rating_{stars}_count', stats[f'stars_{stars}'])
+        self.save(update_fields=['average_rating', 'review_count', 'rating_sum', *HISTOGRAM_FIELDS]) # Save only these fields
+
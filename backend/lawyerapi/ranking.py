@@ -0,0 +1,145 @@
+# lawyerapi/ranking.py
+"""
+Lawyer.ranking_score, the order search lists lawyers in.
+
+The score blends three parts into a number between 0 and 1:
+
+- a Bayesian average rating: every lawyer starts with PRIOR_WEIGHT reviews'
+  worth of the site-wide mean, so a single 5-star review cannot outrank a
+  long record at 4.8;
+- years of experience, capped at MAX_EXPERIENCE_YEARS;
+- how recently the lawyer was last booked, halving every
+  RECENCY_HALF_LIFE_DAYS.
+
+refresh() rescores one lawyer after one of their reviews or bookings changes;
+a deleted or rejected booking recounts the lawyer's last booking first.
+The recency part and the site-wide mean drift as time passes, so the
+renormalize_rankings job runs renormalize() periodically to rescore everyone.
+"""
+import re
+
+from django.core.cache import cache
+from django.db.models import Max, Q, Sum
+from django.utils import timezone
+
+from lawyerapi.models import Lawyer
+
+PRIOR_WEIGHT = 10
+# Mean rating assumed before the site has any reviews
+DEFAULT_PRIOR_MEAN = 3.0
+RATING_WEIGHT = 0.8
+EXPERIENCE_WEIGHT = 0.1
+RECENCY_WEIGHT = 0.1
+MAX_EXPERIENCE_YEARS = 30
+RECENCY_HALF_LIFE_DAYS = 30
+
+PRIOR_MEAN_CACHE_KEY = 'lawyer_ranking:prior_mean'
+# renormalize() refreshes it; the timeout only bounds how stale another process's copy gets
+PRIOR_MEAN_CACHE_TTL = 6 * 3600
+
+
+def experience_years(experience):
+    """Lawyer.experience is free text ("5", "5 years", ...); the first number in it, or 0."""
+    match = re.search(r'\d+', experience or '')
+    return int(match.group()) if match else 0
+
+
+def compute_score(rating_sum, review_count, experience, last_booked_at, prior_mean, now):
+    bayesian = (PRIOR_WEIGHT * prior_mean + rating_sum) / (PRIOR_WEIGHT + review_count)
+    years = min(experience_years(experience), MAX_EXPERIENCE_YEARS)
+    recency = 0.0
+    if last_booked_at is not None:
+        days = max((now - last_booked_at).total_seconds(), 0) / 86400
+        recency = 0.5 ** (days / RECENCY_HALF_LIFE_DAYS)
+    return (
+        RATING_WEIGHT * bayesian / 5
+        + EXPERIENCE_WEIGHT * years / MAX_EXPERIENCE_YEARS
+        + RECENCY_WEIGHT * recency
+    )
+
+
+def site_prior_mean():
+    """Mean rating over every review on the site, from the lawyers' stored totals."""
+    totals = Lawyer.objects.aggregate(ratings=Sum('rating_sum'), reviews=Sum('review_count'))
+    if not totals['reviews']:
+        return DEFAULT_PRIOR_MEAN
+    return totals['ratings'] / totals['reviews']
+
+
+def prior_mean():
+    mean = cache.get(PRIOR_MEAN_CACHE_KEY)
+    if mean is None:
+        mean = site_prior_mean()
+        cache.set(PRIOR_MEAN_CACHE_KEY, mean, PRIOR_MEAN_CACHE_TTL)
+    return mean
+
+
+def refresh(lawyer_id):
+    """Rescores one lawyer from their stored aggregates: one SELECT and one UPDATE."""
+    lawyer = Lawyer.objects.filter(id=lawyer_id).values(
+        'rating_sum', 'review_count', 'experience', 'last_booked_at',
+    ).first()
+    if lawyer is None:
+        return
+    score = compute_score(**lawyer, prior_mean=prior_mean(), now=timezone.now())
+    Lawyer.objects.filter(id=lawyer_id).update(ranking_score=score)
+
+
+def booking_made(booking):
+    """Signal handler body for a saved Booking: the lawyer was just booked."""
+    if booking.status == 'rejected':
+        booking_withdrawn(booking)
+        return
+    updated = Lawyer.objects.filter(
+        Q(last_booked_at__isnull=True) | Q(last_booked_at__lt=booking.created_at), id=booking.lawyer_id,
+    ).update(last_booked_at=booking.created_at)
+    # Later saves of the same booking (status, seen flags) do not move it
+    if updated:
+        refresh(booking.lawyer_id)
+
+
+def booking_withdrawn(booking):
+    """
+    Signal handler body for a Booking that was deleted or rejected, so no
+    longer counts. Only when it was the lawyer's latest does the lawyer's
+    last booking get recounted and the lawyer rescored.
+    """
+    from bookingapi.models import Booking
+
+    if not Lawyer.objects.filter(id=booking.lawyer_id, last_booked_at=booking.created_at).exists():
+        return
+    last = (
+        Booking.objects.filter(lawyer_id=booking.lawyer_id).exclude(status='rejected')
+        .aggregate(last=Max('created_at'))['last']
+    )
+    Lawyer.objects.filter(id=booking.lawyer_id).update(last_booked_at=last)
+    refresh(booking.lawyer_id)
+
+
+def renormalize(batch_size=1000, now=None):
+    """
+    Recomputes the site-wide mean and every lawyer's last booking and score,
+    writing only lawyers whose values changed. Returns how many were written.
+    """
+    from bookingapi.models import Booking
+
+    now = now or timezone.now()
+    mean = site_prior_mean()
+    cache.set(PRIOR_MEAN_CACHE_KEY, mean, PRIOR_MEAN_CACHE_TTL)
+    last_booked = dict(
+        Booking.objects.exclude(status='rejected').values('lawyer_id')
+        .annotate(last=Max('created_at')).order_by().values_list('lawyer_id', 'last')
+    )
+
+    lawyers = Lawyer.objects.only('id', 'rating_sum', 'review_count', 'experience', 'last_booked_at', 'ranking_score')
+    changed = []
+    for lawyer in lawyers.iterator(chunk_size=batch_size):
+        last_booked_at = last_booked.get(lawyer.id)
+        score = compute_score(
+            lawyer.rating_sum, lawyer.review_count, lawyer.experience, last_booked_at, mean, now,
+        )
+        if lawyer.last_booked_at != last_booked_at or abs(lawyer.ranking_score - score) > 1e-9:
+            lawyer.last_booked_at, lawyer.ranking_score = last_booked_at, score
+            changed.append(lawyer)
+    Lawyer.objects.bulk_update(changed, ['last_booked_at', 'ranking_score'], batch_size=batch_size)
+    return len(changed)
@@ -0,0 +1,113 @@
+# lawyerapi/ratings.py
+"""
+A lawyer's stored rating aggregates.
+
+Lawyer.rating_sum, review_count and the per-star rating_<n>_count counters
+are adjusted in place with F() on every review write, and average_rating is
+derived from them in the same UPDATE, so a review costs one single-row UPDATE
+however many reviews the lawyer has (plus the lawyer's ranking refresh).
+recompute() rebuilds everything from the reviews table, for repair, and
+rescores the lawyers it fixes.
+"""
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.db.models import Count, DecimalField, F, FloatField, Q, Sum, Value
+from django.db.models.functions import Cast, Coalesce, NullIf
+from django.utils import timezone
+
+from lawyerapi import ranking
+from lawyerapi.models import HISTOGRAM_FIELDS, Lawyer
+
+
+def _average(rating_sum, review_count):
+    return Coalesce(
+        Cast(Cast(rating_sum, FloatField()) / NullIf(review_count, 0), DecimalField(max_digits=3, decimal_places=2)),
+        Value(Decimal('0.00')),
+        output_field=DecimalField(max_digits=3, decimal_places=2),
+    )
+
+
+def apply_review_change(lawyer_id, added=None, removed=None):
+    """
+    Updates the lawyer's aggregates for one review write: `added` is the
+    rating now counted (None for a delete), `removed` the rating no longer
+    counted (None for a new review).
+    """
+    if added == removed:
+        return
+    rating_delta = (added or 0) - (removed or 0)
+    count_delta = (added is not None) - (removed is not None)
+    rating_sum = F('rating_sum') + rating_delta
+    review_count = F('review_count') + count_delta
+    histogram = {}
+    if added is not None:
+        histogram[f'rating_{added}_count'] = F(f'rating_{added}_count') + 1
+    if removed is not None:
+        histogram[f'rating_{removed}_count'] = F(f'rating_{removed}_count') - 1
+    # Every SET expression reads the row's old values, so the average uses the new totals
+    Lawyer.objects.filter(id=lawyer_id).update(
+        rating_sum=rating_sum,
+        review_count=review_count,
+        average_rating=_average(rating_sum, review_count),
+        **histogram,
+    )
+    ranking.refresh(lawyer_id)
+
+
+def review_saved(review, created):
+    """Signal handler body for a saved Review; a save that leaves the rating as it was is a no-op."""
+    if created:
+        apply_review_change(review.lawyer_id, added=review.rating)
+        return
+    old_lawyer_id, old_rating = review.loaded_rating
+    if old_lawyer_id != review.lawyer_id:
+        apply_review_change(old_lawyer_id, removed=old_rating)
+        apply_review_change(review.lawyer_id, added=review.rating)
+    else:
+        apply_review_change(review.lawyer_id, added=review.rating, removed=old_rating)
+
+
+def review_deleted(review):
+    lawyer_id, rating = review.loaded_rating
+    apply_review_change(lawyer_id, removed=rating)
+
+
+def recompute(batch_size=1000):
+    """
+    Rebuilds every lawyer's aggregates from their reviews with one grouped
+    query, writing only the lawyers that drifted, and refreshes their ranking
+    score from the corrected totals. Returns how many were fixed.
+    """
+    lawyers = Lawyer.objects.annotate(
+        actual_count=Count('reviews'),
+        actual_sum=Coalesce(Sum('reviews__rating'), 0),
+        **{f'actual_{field}': Count('reviews', filter=Q(reviews__rating=stars))
+           for stars, field in enumerate(HISTOGRAM_FIELDS, start=1)},
+    ).only(
+        'id', 'rating_sum', 'review_count', 'average_rating', 'experience', 'last_booked_at', *HISTOGRAM_FIELDS,
+    )
+
+    fields = ['review_count', 'rating_sum', 'average_rating', *HISTOGRAM_FIELDS]
+    stale = []
+    for lawyer in lawyers.iterator(chunk_size=batch_size):
+        count, total = lawyer.actual_count, lawyer.actual_sum
+        actual = {
+            'review_count': count,
+            'rating_sum': total,
+            'average_rating': (Decimal(total) / count).quantize(Decimal('0.01'), ROUND_HALF_UP) if count else Decimal('0.00'),
+            **{field: getattr(lawyer, f'actual_{field}') for field in HISTOGRAM_FIELDS},
+        }
+        if any(getattr(lawyer, field) != value for field, value in actual.items()):
+            for field, value in actual.items():
+                setattr(lawyer, field, value)
+            stale.append(lawyer)
+    Lawyer.objects.bulk_update(stale, fields, batch_size=batch_size)
+
+    # The score is derived from the totals just repaired
+    mean, now = ranking.prior_mean(), timezone.now()
+    for lawyer in stale:
+        lawyer.ranking_score = ranking.compute_score(
+            lawyer.rating_sum, lawyer.review_count, lawyer.experience, lawyer.last_booked_at, mean, now,
+        )
+    Lawyer.objects.bulk_update(stale, ['ranking_score'], batch_size=batch_size)
+    return len(stale)
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.4 on 2026-10-19 19:39
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lawyerapi', '0004_lawyer_rating_histogram'),
+        ('reviews', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['lawyer', '-id'], name='review_lawyer_feed'),
+        ),
+    ]
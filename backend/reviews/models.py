@@ -5,6 +5,7 @@ from django.db.models.signals import post_save, post_delete #
 from django.dispatch import receiver
 
 
+from lawyerapi import ratings
 from lawyerapi.models import Lawyer 
 
 class Review(models.Model):
@@ -36,10 +37,28 @@ class Review(models.Model):
         verbose_name_plural = "Lawyer Reviews"
         unique_together = ('user', 'lawyer') 
         ordering = ['-created_at'] # Order by most recent first
+        indexes = [
+            # A lawyer's review feed pages newest first by id
+            models.Index(fields=['lawyer', '-id'], name='review_lawyer_feed'),
+        ]
 
     def __str__(self):
         return f"Review by {self.user.username} for {self.lawyer.user.username}: {self.rating} stars"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_rating = (instance.__dict__.get('lawyer_id'), instance.__dict__.get('rating'))
+        return instance
+
+    @property
+    def loaded_rating(self):
+        """(lawyer_id, rating) as last saved, i.e. what the lawyer's stored aggregates count for this review."""
+        loaded = getattr(self, '_loaded_rating', None)
+        if loaded is None or None in loaded:
+            return self.lawyer_id, self.rating
+        return loaded
+
 
 class ReviewReply(models.Model):
     review = models.OneToOneField(
@@ -67,9 +86,10 @@ class ReviewReply(models.Model):
 
 # --- Signals to update Lawyer's average_rating and review_count ---
 @receiver(post_save, sender=Review)
-def update_lawyer_rating_on_save(sender, instance, **kwargs):
-    instance.lawyer.update_average_rating()
+def update_lawyer_rating_on_save(sender, instance, created, **kwargs):
+    ratings.review_saved(instance, created)
+    instance._loaded_rating = (instance.lawyer_id, instance.rating)
 
 @receiver(post_delete, sender=Review)
 def update_lawyer_rating_on_delete(sender, instance, **kwargs):
-    instance.lawyer.update_average_rating()
+    ratings.review_deleted(instance)
@@ -0,0 +1,10 @@
+# reviews/pagination.py
+from advocateshub.pagination import IdKeysetPagination
+
+
+class ReviewFeedPagination(IdKeysetPagination):
+    """
+    A lawyer's reviews, newest first; `next` (?before=<review id>) continues
+    with older ones. Review ids follow created_at, and the (lawyer, -id) index
+    serves every page.
+    """
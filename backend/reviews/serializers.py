@@ -74,3 +74,29 @@ class ReviewSerializer(serializers.ModelSerializer):
         instance.feedback = validated_data.get('feedback', instance.feedback)
         instance.save()
         return instance
+
+
+class ReviewerSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = User
+        fields = ['id', 'name', 'profile']
+
+
+class LawyerRatingSummarySerializer(serializers.ModelSerializer):
+    user_id = serializers.IntegerField(read_only=True)
+    name = serializers.CharField(source='user.name', read_only=True)
+    rating_histogram = serializers.ReadOnlyField()
+
+    class Meta:
+        model = Lawyer
+        fields = ['id', 'user_id', 'name', 'average_rating', 'review_count', 'rating_histogram']
+
+
+class ReviewFeedSerializer(serializers.ModelSerializer):
+    """A review in a lawyer's feed; the lawyer is sent once alongside, not with each review."""
+    user = ReviewerSerializer(read_only=True)
+    reply = ReviewReplySerializer(read_only=True)
+
+    class Meta:
+        model = Review
+        fields = ['id', 'user', 'rating', 'feedback', 'created_at', 'reply']
@@ -13,7 +13,10 @@ from rest_framework.serializers import ValidationError
 
 from .models import Review, ReviewReply
 from lawyerapi.models import Lawyer 
-from .serializers import ReviewSerializer, ReviewReplySerializer
+from .pagination import ReviewFeedPagination
+from .serializers import (
+    LawyerRatingSummarySerializer, ReviewFeedSerializer, ReviewReplySerializer, ReviewSerializer,
+)
 from advocateshub.serializers import LawyerSerializer
 
 User = get_user_model()
@@ -66,17 +69,23 @@ class ReviewReplyViewSet(viewsets.ModelViewSet):
         return ReviewReply.objects.filter(lawyer__user=user)
 
 class LawyerReviewsAPIView(APIView):
+    """
+    A lawyer's review feed: the lawyer's rating summary once, then their
+    reviews newest first, a page at a time (see ReviewFeedPagination).
+    """
     permission_classes = [AllowAny] # Reviews can be publicly viewed
+    pagination_class = ReviewFeedPagination
 
     def get(self, request, lawyer_id, format=None):
-        try:
-            lawyer_instance = get_object_or_404(Lawyer, user__id=lawyer_id)
-        except Lawyer.DoesNotExist:
-            return Response({"detail": "Lawyer profile not found."}, status=status.HTTP_404_NOT_FOUND)
-        
-        reviews = Review.objects.filter(lawyer=lawyer_instance).order_by('-created_at')
-        serializer = ReviewSerializer(reviews, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        lawyer_instance = get_object_or_404(Lawyer.objects.select_related('user'), user__id=lawyer_id)
+
+        # Constant queries per page: reviewer and reply (with its lawyer's name) come in the same join
+        reviews = Review.objects.filter(lawyer=lawyer_instance).select_related('user', 'reply__lawyer__user')
+        paginator = self.pagination_class()
+        page = paginator.paginate_queryset(reviews, request, view=self)
+        response = paginator.get_paginated_response(ReviewFeedSerializer(page, many=True).data)
+        response.data['lawyer'] = LawyerRatingSummarySerializer(lawyer_instance).data
+        return response
 
     def post(self, request, lawyer_id, format=None):
     # 👨‍⚖️ Ensure lawyer exists
@@ -90,8 +99,8 @@ class LawyerReviewsAPIView(APIView):
         serializer = ReviewSerializer(data=data, context={'request': request})
 
         if serializer.is_valid():
-            serializer.save()
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
+            review = serializer.save()
+            return Response(ReviewFeedSerializer(review).data, status=status.HTTP_201_CREATED)
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -1,6 +1,8 @@
 from django.contrib import admin
-from .models import VideoSession
+from .models import CallQualityMinute, VideoSession, VideoSessionEvent
 
 
 # Register your models here.
 admin.site.register(VideoSession)
+admin.site.register(VideoSessionEvent)
+admin.site.register(CallQualityMinute)
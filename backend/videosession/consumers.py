@@ -1,66 +1,191 @@
 # videosession/consumers.py
-import json
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
+from django.core.cache import cache
 import logging
-from datetime import datetime
+from urllib.parse import parse_qs
+
+from chat import protocol, store
+from chat.notify import notify_user, user_group
+from chat.presence import Presence, is_present
+from chat.receipts import ReadReceipts
+from chat.ratelimit import ConnectionLimiter, RATE_LIMIT_CLOSE_CODE
+from videosession import lifecycle, telemetry
 
 logger = logging.getLogger(__name__)
 
-# ✅ Custom JSON serializer for datetime
-def json_serializer(obj):
-    if isinstance(obj, datetime):
-        return obj.isoformat()
-    raise TypeError(f"Type {type(obj)} not serializable")
+# WebRTC signaling is relayed to the peer verbatim; only chat messages are decoded
+SIGNALING_TYPES = frozenset({'offer', 'answer', 'ice_candidate'})
+
+# Each booking has exactly two participants, so signaling is addressed to the
+# peer's channel directly; the cache holds each participant's current channel
+PEER_CHANNEL_TTL = 60 * 60 * 6
+
+
+def peer_channel_key(booking_id, user_id):
+    return f'video_peer:{booking_id}:{user_id}'
 
 class VideoSessionConsumer(AsyncWebsocketConsumer):
     async def connect(self):
         self.booking_id = self.scope['url_route']['kwargs']['booking_id']
         self.room_group_name = f'video_chat_{self.booking_id}'
-        self.user = self.scope.get('user', 'AnonymousUser')
+        self.user = self.scope['user']
+        self.peer_channel = None
+        self.binary = False
+        self.limiter = ConnectionLimiter(self.room_group_name)
+        self.presence = None
+        self.receipts = None
+        self.peer_present = False
+        self.session_id = None
 
         logger.info(f"🔌 [Connect] User: {self.user}, Booking ID: {self.booking_id}")
         logger.info(f"🏷️  Room Group: {self.room_group_name}")
 
+        # Only the booking's client and lawyer may join, identified by their JWT
+        if not self.user.is_authenticated:
+            logger.warning(f"⛔ [Connect] Unauthenticated socket for booking {self.booking_id}")
+            await self.close(code=4401)
+            return
+        self.peer_user_id = await self.get_peer_user_id(self.booking_id, self.user)
+        if self.peer_user_id is None:
+            logger.warning(f"⛔ [Connect] User {self.user.id} is not part of booking {self.booking_id}")
+            await self.close(code=4403)
+            return
+
         await self.channel_layer.group_add(self.room_group_name, self.channel_name)
-        await self.accept()
+        await self.channel_layer.group_add(user_group(self.user.id), self.channel_name)
+        subprotocol = protocol.select_subprotocol(self.scope)
+        self.binary = subprotocol == protocol.MSGPACK_SUBPROTOCOL
+        await self.accept(subprotocol)
+        await self.register_channel(self.peer_user_id)
         logger.info(f"✅ [Connected] WebSocket accepted for booking {self.booking_id}")
 
-        # ✅ Load and send past messages
+        # ✅ Send missed messages as a single frame; a reconnecting client passes
+        # ?since=<last message id> so only newer messages are replayed. Without
+        # `resumed` the frame is the full history and replaces what the client has.
         try:
-            past_messages = await self.get_past_messages(self.booking_id)
-            for msg in past_messages:
-                # ✅ Convert timestamp to string
-                msg['timestamp'] = msg['timestamp'].isoformat() if msg['timestamp'] else None
-                # ✅ Use custom serializer
-                await self.send(text_data=json.dumps({
-                    'type': 'chat_message',
-                    'payload': msg
-                }, default=json_serializer))
+            since = self.get_since() if store.resume_supported() else None
+            past_messages, has_more = await store.recent_messages(self.booking_id, since=since)
+            await self.send(**protocol.encode({
+                'type': 'chat_history',
+                'payload': {
+                    'messages': [self.message_payload(msg) for msg in past_messages],
+                    'has_more': has_more,
+                    'resumed': since is not None,
+                }
+            }, self.binary))
             logger.info(f"📩 [History] Sent {len(past_messages)} past messages")
         except Exception as e:
             logger.error(f"❌ [History] Failed to load messages: {e}", exc_info=True)
 
+        self.receipts = ReadReceipts(self.booking_id, self.user, self.announce_read)
+        self.presence = Presence(self.room_group_name, self.user.id)
+        first_connection = await self.presence.join()
+        if first_connection:
+            await self.broadcast_presence('joined')
+        self.session_id = await lifecycle.participant_joined(self.booking_id, self.user, first_connection)
+        self.peer_present = await is_present(self.room_group_name, self.peer_user_id)
+        if self.peer_present:
+            await self.send(**protocol.encode({
+                'type': 'presence',
+                'payload': {'userId': str(self.peer_user_id), 'status': 'joined'}
+            }, self.binary))
+        else:
+            # Ring the other participant on every device they have open
+            await notify_user(self.peer_user_id, 'call_invite', {
+                'booking_id': int(self.booking_id), 'sender_id': self.user.id, 'sender_name': self.user.name,
+            })
+
+    def get_since(self):
+        query = parse_qs(self.scope.get('query_string', b'').decode())
+        try:
+            return int(query['since'][0])
+        except (KeyError, ValueError):
+            return None
+
+    async def register_channel(self, peer_user_id):
+        # Publish our channel before looking up the peer's, so whichever side
+        # connects second always finds the other
+        await cache.aset(peer_channel_key(self.booking_id, self.user.id), self.channel_name, PEER_CHANNEL_TTL)
+        self.peer_channel = await cache.aget(peer_channel_key(self.booking_id, peer_user_id))
+        if self.peer_channel:
+            await self.channel_layer.send(self.peer_channel, {'type': 'peer_joined', 'channel': self.channel_name})
+
     async def disconnect(self, close_code):
         await self.channel_layer.group_discard(self.room_group_name, self.channel_name)
+        if self.user.is_authenticated:
+            await self.channel_layer.group_discard(user_group(self.user.id), self.channel_name)
+        if self.presence and await self.presence.leave():
+            await self.broadcast_presence('left')
+            if self.session_id:
+                # Each side checks after its own leave, so whichever goes last closes the call
+                room_empty = not await is_present(self.room_group_name, self.peer_user_id)
+                await lifecycle.participant_left(self.booking_id, self.session_id, self.user, room_empty)
+        if self.receipts:
+            await self.receipts.close()
+        if self.user.is_authenticated:
+            key = peer_channel_key(self.booking_id, self.user.id)
+            # A newer connection from the same user may already have replaced us
+            if await cache.aget(key) == self.channel_name:
+                await cache.adelete(key)
+        if self.peer_channel:
+            await self.channel_layer.send(self.peer_channel, {'type': 'peer_left', 'channel': self.channel_name})
+        await store.flush()
         logger.info(f"🔌 [Disconnected] Booking: {self.booking_id}, Code: {close_code}, Channel: {self.channel_name}")
 
-    async def receive(self, text_data):
+    async def receive(self, text_data=None, bytes_data=None):
+        frame = text_data if text_data is not None else bytes_data
         try:
-            data = json.loads(text_data)
+            # ⚡ Fast path: offers, answers and ICE bursts go out as the same frame they came in
+            message_type = protocol.peek_type(frame)
+            # Frames whose "type" is not the first key are charged to the default bucket
+            if await self.throttled(message_type):
+                return
+            if message_type in SIGNALING_TYPES:
+                await self.forward_signal(message_type, frame)
+                return
+
+            data = protocol.decode(frame)
             message_type = data.get('type')
             payload = data.get('payload', {})
 
-            sender_id = payload.get('senderId', 'unknown')
-            logger.info(f"📨 [Receive] Type: {message_type} | From: {sender_id} | Booking: {self.booking_id}")
+            if message_type in SIGNALING_TYPES:
+                # "type" was not the first key, so the peek missed it
+                await self.forward_signal(message_type, frame)
+                return
+
+            if message_type == 'read':
+                # No id reads everything so far; under write-behind live messages have none
+                message_id = payload.get('messageId')
+                self.receipts.mark(None if message_id is None else int(message_id))
+                return
+
+            if message_type == 'call_stats':
+                if self.session_id:
+                    telemetry.record_samples(self.session_id, self.user, payload)
+                return
+
+            if message_type == 'typing':
+                if self.presence.typing_due():
+                    await self.channel_layer.group_send(self.room_group_name, {
+                        'type': 'typing_event',
+                        'user_id': str(self.user.id),
+                        'name': self.user.name,
+                        'sender_channel': self.channel_name,
+                    })
+                return
 
-            if message_type == 'chat_message':
-                await self.save_message(
-                    booking_id=self.booking_id,
-                    sender_id=payload['senderId'],
-                    sender_name=payload.get('senderName', 'Unknown'),
-                    text=payload['text']
-                )
+            logger.info(f"📨 [Receive] Type: {message_type} | From: {self.user.id} | Booking: {self.booking_id}")
+
+            if message_type != 'chat_message':
+                logger.warning(f"⚠️ [Receive] Ignoring unknown message type: {message_type}")
+                return
+
+            # Identity comes from the authenticated user, never the client payload;
+            # id stays None under write-behind until the batch is flushed
+            saved_msg = await store.record_message(self.booking_id, self.user, payload['text'])
+            payload = self.message_payload(saved_msg)
+            payload['timestamp'] = saved_msg.timestamp.isoformat()
 
             await self.channel_layer.group_send(
                 self.room_group_name,
@@ -69,53 +194,115 @@ class VideoSessionConsumer(AsyncWebsocketConsumer):
                     'message': payload
                 }
             )
+
+            if not self.peer_present:
+                await notify_user(self.peer_user_id, 'chat_preview', {
+                    'booking_id': int(self.booking_id), 'sender_name': self.user.name, 'message': payload['text'][:100],
+                })
         except Exception as e:
             logger.error(f"❌ [Receive] Unexpected error: {type(e).__name__}: {e}", exc_info=True)
 
+    async def throttled(self, message_type):
+        if self.limiter.allow(message_type):
+            return False
+        if self.limiter.should_close:
+            logger.warning(f"🚦 [RateLimit] Closing flooding socket | User: {self.user.id} | Booking: {self.booking_id}")
+            self.limiter.record_close()
+            await self.close(code=RATE_LIMIT_CLOSE_CODE)
+        return True
+
+    async def broadcast_presence(self, status):
+        await self.channel_layer.group_send(self.room_group_name, {
+            'type': 'presence_event',
+            'user_id': str(self.user.id),
+            'name': self.user.name,
+            'status': status,
+            'sender_channel': self.channel_name,
+        })
+
+    async def forward_signal(self, message_type, frame):
+        logger.debug("📡 [Signal] Type: %s | From: %s | Booking: %s", message_type, self.user.id, self.booking_id)
+        event = {
+            'type': 'signal_frame',
+            'frame': frame,
+            'sender_channel': self.channel_name,
+        }
+        if self.peer_channel:
+            await self.channel_layer.send(self.peer_channel, event)
+        else:
+            # Peer not known to this worker yet; the group still reaches it
+            await self.channel_layer.group_send(self.room_group_name, event)
+
     # === Message Handlers ===
-    async def offer(self, event):
-        await self.send(text_data=json.dumps({'type': 'offer', 'payload': event['message']}, default=json_serializer))
+    async def signal_frame(self, event):
+        if event['sender_channel'] == self.channel_name:
+            return
+        frame = event['frame']
+        if isinstance(frame, bytes) == self.binary:
+            # Already a complete {"type", "payload"} frame in this socket's format
+            await self.send(**protocol.frame_kwargs(frame))
+        else:
+            # The peer negotiated the other wire format, so this frame is transcoded
+            await self.send(**protocol.encode(protocol.decode(frame), self.binary))
 
-    async def answer(self, event):
-        await self.send(text_data=json.dumps({'type': 'answer', 'payload': event['message']}, default=json_serializer))
+    async def peer_joined(self, event):
+        self.peer_channel = event['channel']
 
-    async def ice_candidate(self, event):
-        await self.send(text_data=json.dumps({'type': 'ice_candidate', 'payload': event['message']}, default=json_serializer))
+    async def peer_left(self, event):
+        if self.peer_channel == event['channel']:
+            self.peer_channel = None
 
     async def chat_message(self, event):
-        await self.send(text_data=json.dumps({'type': 'chat_message', 'payload': event['message']}, default=json_serializer))
+        await self.send(**protocol.encode({'type': 'chat_message', 'payload': event['message']}, self.binary))
 
-    # === Database Methods ===
-    @database_sync_to_async
-    def save_message(self, booking_id, sender_id, sender_name, text):
-        from .models import ChatMessage
-        from bookingapi.models import Booking
-        try:
-            booking = Booking.objects.get(id=booking_id)
-            ChatMessage.objects.create(
-                booking=booking,
-                sender_id=sender_id,
-                sender_name=sender_name,
-                text=text
-            )
-        except Exception as e:
-            logger.error(f"❌ [Save] Failed to save message: {e}", exc_info=True)
+    async def presence_event(self, event):
+        if event['user_id'] == str(self.peer_user_id):
+            self.peer_present = event['status'] == 'joined'
+        if event['sender_channel'] != self.channel_name:
+            await self.send(**protocol.encode({
+                'type': 'presence',
+                'payload': {'userId': event['user_id'], 'name': event['name'], 'status': event['status']}
+            }, self.binary))
+
+    async def announce_read(self, message_id):
+        await self.channel_layer.group_send(self.room_group_name, {
+            'type': 'read_receipt',
+            'user_id': str(self.user.id),
+            'message_id': message_id,
+            'sender_channel': self.channel_name,
+        })
 
+    async def read_receipt(self, event):
+        if event['sender_channel'] != self.channel_name:
+            await self.send(**protocol.encode({
+                'type': 'read_receipt',
+                'payload': {'userId': event['user_id'], 'messageId': event['message_id']}
+            }, self.binary))
+
+    async def typing_event(self, event):
+        if event['sender_channel'] != self.channel_name:
+            await self.send(**protocol.encode({
+                'type': 'typing',
+                'payload': {'userId': event['user_id'], 'name': event['name']}
+            }, self.binary))
+
+    async def user_notification(self, event):
+        await self.send(**protocol.encode({
+            'type': 'notification', 'kind': event['kind'], 'payload': event['payload']
+        }, self.binary))
+
+    @staticmethod
+    def message_payload(msg):
+        return {
+            'id': msg.id,
+            'text': msg.message,
+            'senderId': str(msg.sender_id) if msg.sender_id else None,
+            'senderName': msg.sender_name,
+            'timestamp': msg.timestamp,
+        }
+
+    # === Database Methods ===
     @database_sync_to_async
-    def get_past_messages(self, booking_id):
-        from .models import ChatMessage
+    def get_peer_user_id(self, booking_id, user):
         from bookingapi.models import Booking
-        try:
-            booking = Booking.objects.get(id=booking_id)
-            return list(
-                ChatMessage.objects
-                .filter(booking=booking)
-                .values('text', 'sender_id', 'sender_name', 'timestamp')
-                .order_by('timestamp')[:100]
-            )
-        except Booking.DoesNotExist:
-            logger.warning(f"⚠️ [Load] Booking {booking_id} not found")
-            return []
-        except Exception as e:
-            logger.error(f"❌ [Load] Failed to fetch messages: {e}", exc_info=True)
-            return []
\ No newline at end of file
+        return Booking.objects.peer_user_id(booking_id, user)
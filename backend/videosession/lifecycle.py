@@ -0,0 +1,115 @@
+# videosession/lifecycle.py
+"""
+Call bookkeeping for the video socket.
+
+A VideoSession is one call: it opens when a participant connects to a booking
+room with no open session and closes when the last participant leaves. Only a
+user's first and last connection in a room touch the database, with an upsert
+on join and a single UPDATE on close; later connections take the open
+session's id from the cache. The join/leave events themselves go through the
+write-behind buffer.
+
+Whether the room is empty comes from chat.presence, so this needs the cache
+shared by every worker (settings.CACHES, Redis whenever the channel layer is):
+with a per-process cache, a peer connected to another worker looks absent and
+the first disconnect here would end a call that is still going.
+"""
+from datetime import timedelta
+
+from channels.db import database_sync_to_async
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Avg, Count, F, Q
+from django.utils import timezone
+
+from chat.write_behind import get_buffer
+from videosession.models import VideoSession, VideoSessionEvent
+
+# Open session ids are cached this long; a miss just falls back to the upsert
+SESSION_CACHE_TTL = 12 * 3600
+
+
+def session_cache_key(booking_id):
+    return f'video_session:{booking_id}'
+
+
+async def participant_joined(booking_id, user, first_connection):
+    """
+    Returns the booking's open session, opening one if needed. Only the user's
+    first connection in the room opens it and records a join; later ones
+    reuse the cached session id.
+    """
+    session_id = None if first_connection else await cache.aget(session_cache_key(booking_id))
+    if session_id is None:
+        session_id = await open_session(booking_id, user)
+        await cache.aset(session_cache_key(booking_id), session_id, SESSION_CACHE_TTL)
+    if first_connection:
+        get_buffer(VideoSessionEvent).add(
+            VideoSessionEvent(session_id=session_id, user=user, event=VideoSessionEvent.JOINED)
+        )
+    return session_id
+
+
+async def participant_left(booking_id, session_id, user, room_empty):
+    """Records the user's last connection leaving; the session ends once nobody is left in the room."""
+    get_buffer(VideoSessionEvent).add(VideoSessionEvent(session_id=session_id, user=user, event=VideoSessionEvent.LEFT))
+    if room_empty:
+        await end_session(session_id)
+        await cache.adelete(session_cache_key(booking_id))
+
+
+@database_sync_to_async
+def open_session(booking_id, user):
+    session = VideoSession.objects.filter(booking_id=booking_id, is_active=True).only('id').first()
+    if session is None:
+        try:
+            with transaction.atomic():
+                session = VideoSession.objects.create(booking_id=booking_id)
+        except IntegrityError:
+            # The other participant opened it first (one_active_video_session)
+            session = VideoSession.objects.only('id').get(booking_id=booking_id, is_active=True)
+    Participant = VideoSession.participants.through
+    Participant.objects.bulk_create(
+        [Participant(videosession_id=session.id, user_id=user.id)], ignore_conflicts=True,
+    )
+    return session.id
+
+
+@database_sync_to_async
+def end_session(session_id):
+    VideoSession.objects.filter(id=session_id, is_active=True).update(is_active=False, ended_at=timezone.now())
+
+
+def session_stats(days):
+    """
+    Open sessions right now, plus the most sessions open at one time in the
+    last `days` days and the number and average length of calls that ended in
+    that window.
+    """
+    now = timezone.now()
+    since = now - timedelta(days=days)
+    sessions = VideoSession.objects.filter(Q(is_active=True) | Q(ended_at__gte=since))
+    # A session only one participant ever joined was never a call
+    completed = (
+        sessions.filter(is_active=False)
+        .annotate(joined=Count('participants')).filter(joined__gte=2)
+        .aggregate(count=Count('id'), average=Avg(F('ended_at') - F('started_at')))
+    )
+
+    # Sweep over start/end points; an end sorts before a start at the same instant
+    points = []
+    for started_at, ended_at in sessions.values_list('started_at', 'ended_at'):
+        points.append((max(started_at, since), 1))
+        points.append((ended_at or now, -1))
+    peak = current = 0
+    for _, step in sorted(points):
+        current += step
+        peak = max(peak, current)
+
+    return {
+        'active_sessions': sessions.filter(is_active=True).count(),
+        'peak_concurrent_sessions': peak,
+        'completed_calls': completed['count'],
+        'average_duration_seconds': round(completed['average'].total_seconds(), 1) if completed['average'] else None,
+        'days': days,
+    }
@@ -0,0 +1,90 @@
+import json
+import logging
+import time
+from types import SimpleNamespace
+
+from asgiref.sync import async_to_sync
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+from chat.presence import Presence
+from chat.protocol import serialize_datetime
+from chat.ratelimit import ConnectionLimiter
+from videosession.consumers import VideoSessionConsumer
+
+logger = logging.getLogger('videosession.consumers')
+
+# A typical browser offer: one audio and one video m-line with the usual codec list
+SDP_OFFER = "\r\n".join(
+    ["v=0", "o=- 4611731400430051336 2 IN IP4 127.0.0.1", "s=-", "t=0 0", "a=group:BUNDLE 0 1"]
+    + [f"a=rtpmap:{pt} codec{pt}/90000" for pt in range(96, 128)]
+    + [f"a=rtcp-fb:{pt} nack pli" for pt in range(96, 128)]
+    + ["a=fingerprint:sha-256 " + ":".join(["AB"] * 32), "a=setup:actpass", "a=mid:1"]
+)
+ICE_CANDIDATE = {
+    'candidate': "candidate:842163049 1 udp 1677729535 203.0.113.7 54321 typ srflx raddr 10.0.0.2 rport 54321 "
+                 "generation 0 ufrag EsAw network-cost 999",
+    'sdpMid': '0',
+    'sdpMLineIndex': 0,
+}
+
+
+class Command(BaseCommand):
+    help = "Measures per-message CPU cost of relaying WebRTC signaling through VideoSessionConsumer."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--messages', type=int, default=20000)
+
+    def handle(self, *args, **options):
+        count = options['messages']
+        frames = {
+            'offer': json.dumps({'type': 'offer', 'payload': {'type': 'offer', 'sdp': SDP_OFFER}}),
+            'ice_candidate': json.dumps({'type': 'ice_candidate', 'payload': ICE_CANDIDATE}),
+        }
+        # Keep the rate limiter on the measured path without letting it drop frames
+        unlimited = {'default': (1e9, 1e9)}
+        for label, frame in frames.items():
+            legacy = async_to_sync(self.run)(self.legacy_relay, frame, count)
+            with override_settings(WS_RATE_LIMITS=unlimited):
+                relay = self.fast_relay()
+            fast = async_to_sync(self.run)(relay, frame, count)
+            self.stdout.write(
+                f"{label:<14} {len(frame):>6} B   decode+re-encode {legacy:>7.2f}µs   "
+                f"raw relay {fast:>7.2f}µs   speedup {legacy / fast:.1f}x"
+            )
+
+    async def run(self, relay, frame, count):
+        start = time.process_time()
+        for _ in range(count):
+            await relay(frame)
+        return (time.process_time() - start) / count * 1e6
+
+    async def legacy_relay(self, text_data):
+        # The receive/handler pair before signaling frames were forwarded verbatim
+        data = json.loads(text_data)
+        message_type = data.get('type')
+        payload = data.get('payload', {})
+        logger.info(f"📨 [Receive] Type: {message_type} | From: 1 | Booking: 1")
+        event = {'type': message_type, 'message': payload}
+        return json.dumps({'type': event['type'], 'payload': event['message']}, default=serialize_datetime)
+
+    def fast_relay(self):
+        """Runs the real consumer, delivering its direct send to a second consumer standing in for the peer."""
+        consumer, peer = VideoSessionConsumer(), VideoSessionConsumer()
+        consumer.user = SimpleNamespace(id=1)
+        consumer.booking_id = 1
+        consumer.channel_name, peer.channel_name = 'bench.caller', 'bench.peer'
+        consumer.peer_channel = peer.channel_name
+        consumer.binary = peer.binary = False
+        consumer.limiter = ConnectionLimiter('bench')
+        consumer.presence = Presence('bench', 1)
+
+        async def send_to_peer(channel, event):
+            await getattr(peer, event['type'])(event)
+
+        async def send(text_data=None, bytes_data=None, close=False):
+            return text_data
+
+        consumer.channel_layer = SimpleNamespace(send=send_to_peer)
+        peer.send = send
+        return consumer.receive
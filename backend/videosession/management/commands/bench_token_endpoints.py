@@ -0,0 +1,97 @@
+import asyncio
+import time
+
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import AsyncRequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.tokens import AccessToken
+
+from advocateshub.benchutils import create_booking_fixture
+from bookingapi.models import Booking
+from videosession.providers import get_provider
+from videosession.utils import token_cache_key
+from videosession.views import ChatTokenCreateAPIView, VideoTokenRetrieveAPIView
+
+
+class Command(BaseCommand):
+    help = (
+        "Times the chat and video token endpoints against the offline FakeProvider: the first "
+        "request for a booking, repeat requests served from the channel SID and token caches, "
+        "and a burst of concurrent first requests."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--latency-ms', type=int, default=80, help="Simulated provider API round trip.")
+        parser.add_argument('--concurrency', type=int, default=50,
+                            help="Concurrent first chat_token requests, one booking each.")
+
+    def handle(self, *args, **options):
+        booking, users = create_booking_fixture()
+        try:
+            with override_settings(
+                COMMS_PROVIDER='videosession.providers.FakeProvider',
+                FAKE_COMMS_LATENCY_MS=options['latency_ms'],
+            ):
+                for label, view in (('chat_token', ChatTokenCreateAPIView), ('video_token', VideoTokenRetrieveAPIView)):
+                    self.run(label, view.as_view(), booking, options['requests'])
+                self.burst(booking, options['concurrency'], options['latency_ms'])
+        finally:
+            for user in users:
+                user.delete()
+
+    def request(self, view, label, booking):
+        factory = AsyncRequestFactory()
+        authorization = f'Bearer {AccessToken.for_user(booking.client.user)}'
+
+        async def request(booking_id=booking.id):
+            req = factory.get(f'/video/{label}/{booking_id}/', headers={'Authorization': authorization})
+            start = time.perf_counter()
+            response = await view(req, booking_id=booking_id)
+            elapsed = time.perf_counter() - start
+            assert response.status_code == 200, response.content
+            return elapsed
+        return request
+
+    def run(self, label, view, booking, count):
+        request = self.request(view, label, booking)
+
+        async def repeat():
+            return sorted([await request() for _ in range(count)])
+
+        # Cold: no saved channel and no cached token, as on a booking's first call
+        Booking.objects.filter(id=booking.id).update(twilio_channel_sid=None)
+        kind = label.split('_')[0]
+        cache.delete(token_cache_key(f'{get_provider().name}:{kind}', str(booking.client.user_id), booking.id))
+        cold = async_to_sync(request)()
+
+        with CaptureQueriesContext(connection) as queries:
+            warm = async_to_sync(repeat)()
+        p50, p99 = warm[len(warm) // 2] * 1e3, warm[min(len(warm) - 1, int(len(warm) * 0.99))] * 1e3
+        self.stdout.write(
+            f"{label:<12} first {cold * 1e3:>8.2f}ms   repeat p50 {p50:>6.2f}ms  p99 {p99:>6.2f}ms   "
+            f"{len(queries) / count:.1f} queries/request"
+        )
+
+    def burst(self, booking, count, latency_ms):
+        """Concurrent first requests; each waits on two provider round trips (fetch, then create)."""
+        bookings = Booking.objects.bulk_create([
+            Booking(client=booking.client, lawyer=booking.lawyer, scheduled_for=booking.scheduled_for,
+                    status=booking.status)
+            for _ in range(count)
+        ])
+        request = self.request(ChatTokenCreateAPIView.as_view(), 'chat_token', booking)
+
+        async def burst():
+            start = time.perf_counter()
+            await asyncio.gather(*(request(b.id) for b in bookings))
+            return time.perf_counter() - start
+
+        elapsed = async_to_sync(burst)()
+        self.stdout.write(
+            f"{count} concurrent first chat_token requests: {elapsed * 1e3:.0f}ms "
+            f"(serialized provider calls would take {count * 2 * latency_ms}ms)"
+        )
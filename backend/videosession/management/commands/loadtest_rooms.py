@@ -0,0 +1,300 @@
+import asyncio
+import contextlib
+import datetime
+import io
+import itertools
+import json
+import time
+import uuid
+
+from asgiref.sync import async_to_sync
+from channels.layers import InMemoryChannelLayer
+from channels.testing import WebsocketCommunicator
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from advocateshub.benchutils import ensure_scratch_database
+from advocateshub.models import User
+from bookingapi.models import Booking
+from chat import store
+from chat.ratelimit import backpressure, backpressure_stats
+from chat.write_behind import flush_all
+from clientapi.models import Client
+from lawyerapi.models import Lawyer
+from videosession.management.commands.bench_signaling import ICE_CANDIDATE, SDP_OFFER
+
+
+class LoadTestChannelLayer(InMemoryChannelLayer):
+    """
+    InMemoryChannelLayer sweeps every channel and group for expired entries on
+    each send and receive, which is quadratic at thousands of sockets and would
+    be all this command measured. Sweep once a second instead, as Redis
+    expiry costs nothing per message.
+    """
+
+    swept_at = 0.0
+
+    def _clean_expired(self):
+        if time.monotonic() - self.swept_at >= 1.0:
+            self.swept_at = time.monotonic()
+            super()._clean_expired()
+
+
+IN_MEMORY_LAYER = {'default': {'BACKEND': f'{__name__}.LoadTestChannelLayer', 'CONFIG': {'capacity': 1000}}}
+
+
+class Room:
+    """The client and lawyer of one booking, each with a video and a chat socket."""
+
+    def __init__(self, booking_id, tokens):
+        self.booking_id = booking_id
+        self.tokens = tokens
+        self.video = []
+        self.chat = []
+
+
+class Command(BaseCommand):
+    help = (
+        "Opens concurrent consultation rooms against the ASGI application in-process and reports "
+        "connect latency, delivery latency percentiles and DB queries per message."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rooms', type=int, default=250, help="Each room opens four sockets.")
+        parser.add_argument('--ice', type=int, default=12, help="ICE candidates each side sends after the offer/answer.")
+        parser.add_argument('--chat-duration', type=float, default=10.0, help="Seconds of chat traffic per room.")
+        parser.add_argument('--chat-rate', type=float, default=0.5, help="Chat messages per second per participant.")
+        parser.add_argument('--concurrency', type=int, default=200, help="Sockets connecting at the same time.")
+        parser.add_argument('--timeout', type=float, default=30.0, help="Seconds to wait for a connect or a delivery.")
+        parser.add_argument(
+            '--layer', choices=['memory', 'settings'], default='memory',
+            help="'memory' uses InMemoryChannelLayer; 'settings' uses CHANNEL_LAYERS, e.g. a local Redis.",
+        )
+
+    def handle(self, *args, **options):
+        # Imported here so the command still loads when the ASGI stack is misconfigured
+        from backend.asgi import application
+        self.application = application
+        self.options = options
+
+        rooms, users = self.create_fixture(options['rooms'])
+        try:
+            layers = IN_MEMORY_LAYER if options['layer'] == 'memory' else None
+            # ChatConsumer prints on every connect and disconnect
+            with override_settings(**({'CHANNEL_LAYERS': layers} if layers else {})), \
+                    contextlib.redirect_stdout(io.StringIO()), self.count_queries() as self.queries:
+                results = async_to_sync(self.run)(rooms)
+            self.report(options, results)
+        finally:
+            User.objects.filter(id__in=[user.id for user in users]).delete()
+
+    async def run(self, rooms):
+        backpressure.clear()
+        # probe key -> (send time, sending socket), and the ones still in flight
+        self.sent = {}
+        self.in_flight = {}
+        self.latencies = {'signaling': [], 'chat': []}
+        self.probes = itertools.count()
+        self.gate = asyncio.Semaphore(self.options['concurrency'])
+        results = {}
+
+        queries = self.queries[0]
+        start = time.perf_counter()
+        connects = await asyncio.gather(*(self.connect_room(room) for room in rooms))
+        results['connect_wall'] = time.perf_counter() - start
+        results['connect'] = [latency for room in connects for latency in room]
+        results['connect_queries'], queries = self.queries[0] - queries, self.queries[0]
+        readers = [
+            asyncio.ensure_future(self.read(comm))
+            for room in rooms for comm in room.video + room.chat
+        ]
+
+        try:
+            start = time.perf_counter()
+            await asyncio.gather(*(self.signal(room) for room in rooms))
+            await self.drain('signaling')
+            results['signaling_wall'] = time.perf_counter() - start
+            results['signaling_queries'], queries = self.queries[0] - queries, self.queries[0]
+
+            start = time.perf_counter()
+            await asyncio.gather(*(self.chat(room) for room in rooms))
+            await self.drain('chat')
+            # Write-behind buffers count towards the messages that filled them
+            await store.flush()
+            results['chat_wall'] = time.perf_counter() - start
+            results['chat_queries'] = self.queries[0] - queries
+        finally:
+            for reader in readers:
+                reader.cancel()
+            await asyncio.gather(*readers, return_exceptions=True)
+            await asyncio.gather(
+                *(comm.disconnect() for room in rooms for comm in room.video + room.chat),
+                return_exceptions=True,
+            )
+            # Session join/leave events must land before the fixture is deleted
+            await flush_all()
+
+        results['sent'] = {kind: sum(1 for k, _ in self.sent if k == kind) for kind in self.latencies}
+        results['latencies'] = self.latencies
+        results['backpressure'] = backpressure_stats()
+        return results
+
+    async def connect_room(self, room):
+        latencies = []
+        for path, sockets in ((f'/ws/video_session/{room.booking_id}/', room.video), (f'/ws/chat/{room.booking_id}/', room.chat)):
+            for token in room.tokens:
+                comm = WebsocketCommunicator(self.application, f'{path}?token={token}')
+                async with self.gate:
+                    start = time.perf_counter()
+                    connected, code = await comm.connect(timeout=self.options['timeout'])
+                    latencies.append(time.perf_counter() - start)
+                if not connected:
+                    raise RuntimeError(f"{path} refused the connection with code {code}")
+                sockets.append(comm)
+        return latencies
+
+    async def read(self, comm):
+        while True:
+            output = await comm.receive_output(timeout=None)
+            if output['type'] != 'websocket.send':
+                return
+            received = time.perf_counter()
+            data = json.loads(output['text'])
+            if data.get('type') in ('offer', 'answer', 'ice_candidate'):
+                key = ('signaling', data['payload'].get('probe'))
+            elif 'message' in data and 'type' not in data:
+                key = ('chat', data['message'])
+            else:
+                continue
+            # The chat group echoes to the sender as well; only the peer's copy counts
+            delivered = self.in_flight.get(key)
+            if delivered is not None and self.sent[key][1] is not comm:
+                del self.in_flight[key]
+                self.latencies[key[0]].append(received - self.sent[key][0])
+                delivered.set()
+
+    async def send_probe(self, comm, kind, frame):
+        probe = next(self.probes)
+        key = ('signaling', probe) if kind == 'signaling' else ('chat', f'load {probe}')
+        if kind == 'signaling':
+            frame['payload'] = {**frame['payload'], 'probe': probe}
+        else:
+            frame = {'message': key[1]}
+        self.in_flight[key] = asyncio.Event()
+        self.sent[key] = (time.perf_counter(), comm)
+        await comm.send_to(text_data=json.dumps(frame))
+        return key
+
+    async def signal(self, room):
+        caller, callee = room.video
+        offer = await self.send_probe(caller, 'signaling', {'type': 'offer', 'payload': {'type': 'offer', 'sdp': SDP_OFFER}})
+        await self.wait_for(offer)
+        answer = await self.send_probe(callee, 'signaling', {'type': 'answer', 'payload': {'type': 'answer', 'sdp': SDP_OFFER}})
+        await self.wait_for(answer)
+        # Both sides trickle their candidates as soon as gathering finishes
+        for _ in range(self.options['ice']):
+            for comm in room.video:
+                await self.send_probe(comm, 'signaling', {'type': 'ice_candidate', 'payload': ICE_CANDIDATE})
+            await asyncio.sleep(0.005)
+
+    async def chat(self, room):
+        interval = 1 / self.options['chat_rate']
+        deadline = time.perf_counter() + self.options['chat_duration']
+        # Stagger rooms so they do not all send on the same tick
+        await asyncio.sleep(interval * (room.booking_id % 10) / 10)
+        while time.perf_counter() < deadline:
+            for comm in room.chat:
+                await self.send_probe(comm, 'chat', {})
+            await asyncio.sleep(interval)
+
+    async def wait_for(self, key):
+        delivered = self.in_flight.get(key)
+        if delivered is not None:
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(delivered.wait(), self.options['timeout'])
+
+    async def drain(self, kind):
+        """Waits for every probe of this kind to arrive; dropped ones time out."""
+        pending = [key for key in self.in_flight if key[0] == kind]
+        await asyncio.gather(*(self.wait_for(key) for key in pending))
+
+    @contextlib.contextmanager
+    def count_queries(self):
+        """
+        Counts queries on this thread's connection, where database_sync_to_async
+        runs the consumers' DB work while async_to_sync waits on them.
+        """
+        count = [0]
+
+        def counter(execute, sql, params, many, context):
+            count[0] += 1
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(counter):
+            yield count
+
+    def report(self, options, results):
+        rooms = options['rooms']
+        sockets = len(results['connect'])
+        self.stdout.write(
+            f"{rooms} rooms, {sockets} sockets, channel layer: {options['layer']}"
+        )
+        self.stdout.write(
+            f"connect        {self.percentiles(results['connect'])}   "
+            f"{sockets / results['connect_wall']:>8.0f} conn/s   "
+            f"{results['connect_queries'] / sockets:>5.2f} queries/conn"
+        )
+        for kind in ('signaling', 'chat'):
+            sent = results['sent'][kind]
+            delivered = len(results['latencies'][kind])
+            self.stdout.write(
+                f"{kind:<14} {self.percentiles(results['latencies'][kind])}   "
+                f"{sent / results[f'{kind}_wall']:>8.0f} msg/s   "
+                f"{results[f'{kind}_queries'] / max(sent, 1):>5.2f} queries/msg   "
+                f"delivered {delivered}/{sent}"
+            )
+        for row in results['backpressure'][:5]:
+            self.stdout.write(f"rate limited   {row['room']}: dropped {row['dropped']}, closed {row['closed']}")
+
+    def percentiles(self, samples):
+        if not samples:
+            return f"{'no samples':<44}"
+        samples = sorted(samples)
+        p50, p90, p99 = (samples[min(len(samples) - 1, int(len(samples) * q))] * 1e3 for q in (0.5, 0.9, 0.99))
+        return f"p50 {p50:>7.2f}ms  p90 {p90:>7.2f}ms  p99 {p99:>7.2f}ms"
+
+    def create_fixture(self, count):
+        ensure_scratch_database()
+        tag = uuid.uuid4().hex[:8]
+        users = []
+        for i in range(count):
+            for role in ('client', 'lawyer'):
+                user = User(
+                    username=f'load-{role}-{tag}-{i}', email=f'load-{role}-{tag}-{i}@example.com',
+                    name=f'Load {role.title()} {i}', phone='0', role=role,
+                )
+                # Skips password hashing, which would dominate fixture setup
+                user.set_unusable_password()
+                users.append(user)
+        users = User.objects.bulk_create(users)
+        clients = Client.objects.bulk_create([
+            Client(user=user, language='English', dob=datetime.date(1990, 1, 1)) for user in users[0::2]
+        ])
+        lawyers = Lawyer.objects.bulk_create([
+            Lawyer(
+                user=user, cnic='0', education='LLB', location='Load', court_level='District',
+                case_types='Civil', experience='1', availability='', price=0,
+            )
+            for user in users[1::2]
+        ])
+        bookings = Booking.objects.bulk_create([
+            Booking(client=client, lawyer=lawyer, scheduled_for=datetime.datetime.now(), status='confirmed')
+            for client, lawyer in zip(clients, lawyers)
+        ])
+        rooms = [
+            Room(booking.id, (str(AccessToken.for_user(client.user)), str(AccessToken.for_user(lawyer.user))))
+            for booking, client, lawyer in zip(bookings, clients, lawyers)
+        ]
+        return rooms, users
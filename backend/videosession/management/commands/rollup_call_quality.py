@@ -0,0 +1,17 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from videosession.telemetry import prune, rollup
+
+
+class Command(BaseCommand):
+    help = "Rolls call-quality samples up into per-minute buckets and deletes raw samples past retention."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--retention-hours', type=int, default=settings.CALL_QUALITY_RETENTION_HOURS)
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        minutes = rollup()
+        deleted = prune(options['retention_hours'], batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Rolled up {minutes} minutes, deleted {deleted} raw samples."))
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.4 on 2026-10-19 18:58
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0003_merge_video_chat_messages'),
+        ('videosession', '0002_chatmessage'),
+    ]
+
+    operations = [
+        migrations.DeleteModel(
+            name='ChatMessage',
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.4 on 2026-10-19 19:27
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookingapi', '0001_initial'),
+        ('videosession', '0003_delete_chatmessage'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VideoSessionEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event', models.CharField(choices=[('joined', 'Joined'), ('left', 'Left')], max_length=10)),
+                ('at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='videosession',
+            name='booking',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='video_sessions', to='bookingapi.booking'),
+        ),
+        migrations.AddIndex(
+            model_name='videosession',
+            index=models.Index(fields=['ended_at'], name='video_session_ended_at'),
+        ),
+        migrations.AddConstraint(
+            model_name='videosession',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_active', True)), fields=('booking',), name='one_active_video_session'),
+        ),
+        migrations.AddField(
+            model_name='videosessionevent',
+            name='session',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='events', to='videosession.videosession'),
+        ),
+        migrations.AddField(
+            model_name='videosessionevent',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+    ]
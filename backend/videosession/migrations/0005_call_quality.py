@@ -0,0 +1,53 @@
+# Generated by Django 5.2.4 on 2026-10-19 19:31
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('videosession', '0004_session_lifecycle'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CallQualityMinute',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('minute', models.DateTimeField()),
+                ('samples', models.PositiveIntegerField()),
+                ('avg_rtt_ms', models.FloatField(null=True)),
+                ('max_rtt_ms', models.FloatField(null=True)),
+                ('avg_packet_loss', models.FloatField(null=True)),
+                ('max_packet_loss', models.FloatField(null=True)),
+                ('avg_bitrate_kbps', models.FloatField(null=True)),
+                ('min_bitrate_kbps', models.FloatField(null=True)),
+                ('min_frame_height', models.PositiveIntegerField(null=True)),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='quality_minutes', to='videosession.videosession')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('session', 'user', 'minute'), name='unique_call_quality_minute')],
+            },
+        ),
+        migrations.CreateModel(
+            name='CallQualitySample',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('at', models.DateTimeField()),
+                ('rtt_ms', models.FloatField(null=True)),
+                ('packet_loss', models.FloatField(null=True)),
+                ('bitrate_kbps', models.FloatField(null=True)),
+                ('frame_width', models.PositiveIntegerField(null=True)),
+                ('frame_height', models.PositiveIntegerField(null=True)),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='quality_samples', to='videosession.videosession')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['at'], name='call_quality_sample_at')],
+            },
+        ),
+    ]
@@ -4,8 +4,8 @@ from bookingapi.models import Booking
 from advocateshub.models import User
 
 class VideoSession(models.Model):
-    # OneToOneField creates a 1:1 relationship between a Booking and a VideoSession.
-    booking = models.OneToOneField(Booking, on_delete=models.CASCADE, related_name='video_session')
+    # One row per call; a booking whose call drops and reconnects later gets another one.
+    booking = models.ForeignKey(Booking, on_delete=models.CASCADE, related_name='video_sessions')
     
     # ManyToManyField creates a relationship where multiple users can be in one session.
     participants = models.ManyToManyField(User)
@@ -19,6 +19,17 @@ class VideoSession(models.Model):
     # A flag to easily check if the session is currently active.
     is_active = models.BooleanField(default=True)
 
+    class Meta:
+        constraints = [
+            # At most one open call per booking, so opening one is a race-free upsert
+            models.UniqueConstraint(
+                fields=['booking'], condition=models.Q(is_active=True), name='one_active_video_session',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['ended_at'], name='video_session_ended_at'),
+        ]
+
     def __str__(self):
         """
         Returns a string representation of the object. This is a crucial method
@@ -27,27 +38,53 @@ class VideoSession(models.Model):
         return f"VideoSession for Booking #{self.booking.id}"
 
 
+class VideoSessionEvent(models.Model):
+    """A participant joining or leaving a call, written in batches off the socket path."""
+    JOINED = 'joined'
+    LEFT = 'left'
+
+    session = models.ForeignKey(VideoSession, on_delete=models.CASCADE, related_name='events')
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    event = models.CharField(max_length=10, choices=[(JOINED, 'Joined'), (LEFT, 'Left')])
+    at = models.DateTimeField(default=timezone.now)
 
-from django.contrib.auth import get_user_model
+    def __str__(self):
+        return f"{self.user_id} {self.event} session #{self.session_id} at {self.at}"
 
-User = get_user_model()
 
-class ChatMessage(models.Model):
-    booking = models.ForeignKey(
-        Booking,
-        on_delete=models.CASCADE,
-        related_name='chat_messages'
-    )
-    sender_id = models.CharField(max_length=100)  # From frontend `userId.current`
-    sender_name = models.CharField(max_length=100, default="User")
-    text = models.TextField()
-    timestamp = models.DateTimeField(default=timezone.now)
+class CallQualitySample(models.Model):
+    """One getStats() reading from a participant's browser; deleted after CALL_QUALITY_RETENTION_HOURS."""
+    session = models.ForeignKey(VideoSession, on_delete=models.CASCADE, related_name='quality_samples')
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    at = models.DateTimeField()
+    rtt_ms = models.FloatField(null=True)
+    # Fraction of inbound packets lost since the previous sample, 0..1
+    packet_loss = models.FloatField(null=True)
+    bitrate_kbps = models.FloatField(null=True)
+    frame_width = models.PositiveIntegerField(null=True)
+    frame_height = models.PositiveIntegerField(null=True)
 
     class Meta:
-        ordering = ['timestamp']  # Oldest first
         indexes = [
-            models.Index(fields=['booking', 'timestamp']),
+            models.Index(fields=['at'], name='call_quality_sample_at'),
         ]
 
-    def __str__(self):
-        return f"{self.sender_name}: {self.text[:50]}..."
\ No newline at end of file
+
+class CallQualityMinute(models.Model):
+    """Per-minute rollup of a participant's samples, kept after the raw samples expire."""
+    session = models.ForeignKey(VideoSession, on_delete=models.CASCADE, related_name='quality_minutes')
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    minute = models.DateTimeField()
+    samples = models.PositiveIntegerField()
+    avg_rtt_ms = models.FloatField(null=True)
+    max_rtt_ms = models.FloatField(null=True)
+    avg_packet_loss = models.FloatField(null=True)
+    max_packet_loss = models.FloatField(null=True)
+    avg_bitrate_kbps = models.FloatField(null=True)
+    min_bitrate_kbps = models.FloatField(null=True)
+    min_frame_height = models.PositiveIntegerField(null=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['session', 'user', 'minute'], name='unique_call_quality_minute'),
+        ]
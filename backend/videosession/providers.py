@@ -0,0 +1,184 @@
+# videosession/providers.py
+"""
+Video and chat providers behind the token endpoints.
+
+settings.COMMS_PROVIDER names the backend class: TwilioProvider in
+production, or FakeProvider to run the token endpoints with no network or
+credentials, e.g. to benchmark or regression-test them offline.
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import threading
+import time
+from functools import lru_cache
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils.module_loading import import_string
+from twilio.base.exceptions import TwilioRestException
+from twilio.jwt.access_token import AccessToken
+from twilio.jwt.access_token.grants import ChatGrant, VideoGrant
+
+from .utils import (
+    TOKEN_TTL, TWILIO_HTTP_TIMEOUT, generate_twilio_chat_token, generate_twilio_video_token,
+    get_async_twilio_client, get_twilio_client,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def get_provider():
+    """The configured provider; one instance per process."""
+    return _load_provider(settings.COMMS_PROVIDER)
+
+
+@lru_cache(maxsize=None)
+def _load_provider(path):
+    return import_string(path)()
+
+
+class CommsProvider:
+    """What the token endpoints need from a video/chat provider."""
+    name = None
+
+    def video_configured(self):
+        raise NotImplementedError
+
+    def chat_configured(self):
+        raise NotImplementedError
+
+    def video_token(self, identity, room_name):
+        raise NotImplementedError
+
+    def chat_token(self, identity):
+        raise NotImplementedError
+
+    def ensure_chat_channel(self, booking_id):
+        """Returns the SID of the booking's chat channel, creating the channel if it does not exist."""
+        raise NotImplementedError
+
+    async def aensure_chat_channel(self, booking_id):
+        """ensure_chat_channel() for async callers. Providers with an async client override this."""
+        return await sync_to_async(self.ensure_chat_channel, thread_sensitive=False)(booking_id)
+
+
+class TwilioProvider(CommsProvider):
+    name = 'twilio'
+
+    @property
+    def chat_service_sid(self):
+        return os.environ.get('TWILIO_CHAT_SERVICE_SID')
+
+    def video_configured(self):
+        return all([os.environ.get('TWILIO_ACCOUNT_SID'), os.environ.get('TWILIO_AUTH_TOKEN')])
+
+    def chat_configured(self):
+        return self.video_configured() and bool(self.chat_service_sid)
+
+    def video_token(self, identity, room_name):
+        return generate_twilio_video_token(identity, room_name=room_name)
+
+    def chat_token(self, identity):
+        return generate_twilio_chat_token(identity, self.chat_service_sid)
+
+    def ensure_chat_channel(self, booking_id):
+        channels = get_twilio_client().chat.v2.services(self.chat_service_sid).channels
+        channel_unique_name = f"chat_{booking_id}"
+
+        try:
+            # Try to retrieve the channel by its unique name.
+            return channels(channel_unique_name).fetch().sid
+        except TwilioRestException as e:
+            # If the channel doesn't exist, the API will return a 404 error.
+            # If a different exception occurs, we'll re-raise it.
+            if e.status != 404:
+                raise e
+        logger.info("Chat channel %s not found. Creating a new one...", channel_unique_name)
+        return channels.create(
+            unique_name=channel_unique_name,
+            friendly_name=f"Booking {booking_id} Chat",
+            type='private'
+        ).sid
+
+    async def aensure_chat_channel(self, booking_id):
+        channels = get_async_twilio_client().chat.v2.services(self.chat_service_sid).channels
+        channel_unique_name = f"chat_{booking_id}"
+
+        async with asyncio.timeout(TWILIO_HTTP_TIMEOUT):
+            try:
+                return (await channels(channel_unique_name).fetch_async()).sid
+            except TwilioRestException as e:
+                if e.status != 404:
+                    raise e
+        logger.info("Chat channel %s not found. Creating a new one...", channel_unique_name)
+        async with asyncio.timeout(TWILIO_HTTP_TIMEOUT):
+            channel = await channels.create_async(
+                unique_name=channel_unique_name,
+                friendly_name=f"Booking {booking_id} Chat",
+                type='private'
+            )
+        return channel.sid
+
+
+class FakeProvider(CommsProvider):
+    """
+    Offline stand-in for Twilio. Tokens are real Twilio-format access tokens
+    signed with a fixed dummy key (never the site's SECRET_KEY, which also
+    signs the API's JWTs), and channel fetch/create sleep (asyncio.sleep
+    on the async path) for settings.FAKE_COMMS_LATENCY_MS each, like a round
+    trip to the API.
+    """
+    name = 'fake'
+    ACCOUNT_SID = 'AC' + '0' * 32
+    API_KEY_SID = 'SK' + '0' * 32
+    CHAT_SERVICE_SID = 'IS' + '0' * 32
+    SIGNING_KEY = 'fake-comms-provider-signing-key'
+
+    def __init__(self):
+        # Channels "created" so far in this process: unique name -> SID
+        self.channels = {}
+        self.lock = threading.Lock()
+
+    def video_configured(self):
+        return True
+
+    def chat_configured(self):
+        return True
+
+    def mint(self, identity, grant):
+        token = AccessToken(self.ACCOUNT_SID, self.API_KEY_SID, self.SIGNING_KEY, identity=identity, ttl=TOKEN_TTL)
+        token.add_grant(grant)
+        return token.to_jwt()
+
+    def video_token(self, identity, room_name):
+        return self.mint(identity, VideoGrant(room=room_name))
+
+    def chat_token(self, identity):
+        return self.mint(identity, ChatGrant(service_sid=self.CHAT_SERVICE_SID))
+
+    def ensure_chat_channel(self, booking_id):
+        name = f"chat_{booking_id}"
+        # The fetch
+        time.sleep(self.latency)
+        if name not in self.channels:
+            # Not found, so the create
+            time.sleep(self.latency)
+        return self.create_channel(name)
+
+    async def aensure_chat_channel(self, booking_id):
+        name = f"chat_{booking_id}"
+        await asyncio.sleep(self.latency)
+        if name not in self.channels:
+            await asyncio.sleep(self.latency)
+        return self.create_channel(name)
+
+    def create_channel(self, name):
+        with self.lock:
+            return self.channels.setdefault(name, 'CH' + hashlib.md5(name.encode()).hexdigest())
+
+    @property
+    def latency(self):
+        """Simulated API round trip, in seconds."""
+        return settings.FAKE_COMMS_LATENCY_MS / 1000
@@ -2,5 +2,5 @@ from django.urls import re_path
 from . import consumers
 
 websocket_urlpatterns = [
-    re_path(r'ws/video_session/(?P<booking_id>\w+)/$', consumers.VideoSessionConsumer.as_asgi()),
+    re_path(r'ws/video_session/(?P<booking_id>\d+)/$', consumers.VideoSessionConsumer.as_asgi()),
 ]
\ No newline at end of file
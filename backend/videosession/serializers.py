@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from userapi.models import VideoSession
+from .models import VideoSession
 from advocateshub.models import User
 
 class VideoSessionSerializer(serializers.ModelSerializer):
@@ -17,3 +17,4 @@ class VideoSessionSerializer(serializers.ModelSerializer):
         video_session = VideoSession.objects.create(**validated_data)
         video_session.participants.set(participants)
         return video_session
+
@@ -0,0 +1,143 @@
+# videosession/telemetry.py
+"""
+Call-quality telemetry from the video socket.
+
+Browsers sample RTCPeerConnection.getStats() every few seconds and send the
+readings in batches as `call_stats` frames. Samples only get validated on the
+socket; saving goes through the write-behind buffer. The rollup_call_quality
+job folds them into per-minute CallQualityMinute rows and deletes raw samples
+once they are past the retention window.
+"""
+import math
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Avg, Count, Max, Min
+from django.db.models.functions import TruncMinute
+from django.utils import timezone
+
+from chat.write_behind import get_buffer
+from videosession.models import CallQualityMinute, CallQualitySample
+
+MAX_SAMPLES_PER_BATCH = 30
+# Samples carry their age ("ago", ms) rather than a client clock reading; older ones are dropped
+MAX_SAMPLE_AGE_MS = 60_000
+MAX_SAMPLE_AGE = timedelta(milliseconds=MAX_SAMPLE_AGE_MS)
+# A minute is rolled up once no sample for it can still be on its way: the oldest accepted
+# sample, plus a write-behind flush, plus slack for a flush that is retried
+ROLLUP_DELAY = MAX_SAMPLE_AGE + timedelta(seconds=settings.CHAT_WRITE_BEHIND_FLUSH_INTERVAL) + timedelta(seconds=30)
+
+# Frame keys -> sample fields
+SAMPLE_FIELDS = {
+    'rttMs': 'rtt_ms',
+    'packetLoss': 'packet_loss',
+    'bitrateKbps': 'bitrate_kbps',
+    'frameWidth': 'frame_width',
+    'frameHeight': 'frame_height',
+}
+INTEGER_FIELDS = {'frame_width', 'frame_height'}
+
+
+def _number(value):
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    if not math.isfinite(value) or value < 0:
+        return None
+    return value
+
+
+def parse_samples(session_id, user, payload, received_at=None):
+    """Unsaved CallQualitySample rows for the valid readings in a `call_stats` payload."""
+    received_at = received_at or timezone.now()
+    samples = payload.get('samples') if isinstance(payload, dict) else None
+    if not isinstance(samples, list):
+        return []
+
+    rows = []
+    for sample in samples[:MAX_SAMPLES_PER_BATCH]:
+        if not isinstance(sample, dict):
+            continue
+        ago = _number(sample.get('ago', 0))
+        if ago is None or ago > MAX_SAMPLE_AGE_MS:
+            continue
+        values = {}
+        for key, field in SAMPLE_FIELDS.items():
+            value = _number(sample.get(key))
+            if value is not None and field in INTEGER_FIELDS:
+                value = int(value)
+            values[field] = value
+        if values['packet_loss'] is not None:
+            values['packet_loss'] = min(values['packet_loss'], 1.0)
+        if all(value is None for value in values.values()):
+            continue
+        rows.append(CallQualitySample(
+            session_id=session_id, user=user, at=received_at - timedelta(milliseconds=ago), **values,
+        ))
+    return rows
+
+
+def record_samples(session_id, user, payload):
+    """Queues a batch of samples for saving; returns how many were accepted."""
+    rows = parse_samples(session_id, user, payload)
+    buffer = get_buffer(CallQualitySample)
+    for row in rows:
+        buffer.add(row)
+    return len(rows)
+
+
+def rollup(now=None):
+    """Upserts a CallQualityMinute for every finished minute not rolled up yet; returns how many."""
+    now = now or timezone.now()
+    cutoff = (now - ROLLUP_DELAY).replace(second=0, microsecond=0)
+    samples = CallQualitySample.objects.filter(at__lt=cutoff)
+    # Redo the newest rolled-up minutes a late batch could still reach; the upsert overwrites them
+    last_minute = CallQualityMinute.objects.aggregate(last=Max('minute'))['last']
+    if last_minute is not None:
+        samples = samples.filter(at__gte=last_minute - MAX_SAMPLE_AGE)
+
+    rows = (
+        samples
+        .annotate(minute=TruncMinute('at'))
+        .values('session_id', 'user_id', 'minute')
+        .annotate(
+            samples=Count('id'),
+            avg_rtt_ms=Avg('rtt_ms'),
+            max_rtt_ms=Max('rtt_ms'),
+            avg_packet_loss=Avg('packet_loss'),
+            max_packet_loss=Max('packet_loss'),
+            avg_bitrate_kbps=Avg('bitrate_kbps'),
+            min_bitrate_kbps=Min('bitrate_kbps'),
+            min_frame_height=Min('frame_height'),
+        )
+        .order_by()
+    )
+    minutes = [CallQualityMinute(**row) for row in rows]
+    CallQualityMinute.objects.bulk_create(
+        minutes,
+        batch_size=1000,
+        update_conflicts=True,
+        unique_fields=['session', 'user', 'minute'],
+        update_fields=[
+            'samples', 'avg_rtt_ms', 'max_rtt_ms', 'avg_packet_loss', 'max_packet_loss',
+            'avg_bitrate_kbps', 'min_bitrate_kbps', 'min_frame_height',
+        ],
+    )
+    return len(minutes)
+
+
+def prune(retention_hours, batch_size=5000, now=None):
+    """Deletes raw samples older than the retention window that are already rolled up; returns how many."""
+    now = now or timezone.now()
+    last_minute = CallQualityMinute.objects.aggregate(last=Max('minute'))['last']
+    if last_minute is None:
+        return 0
+    # Keep whatever the next rollup redoes
+    cutoff = min(now - timedelta(hours=retention_hours), last_minute - MAX_SAMPLE_AGE)
+
+    deleted = 0
+    while True:
+        # Short deletes keep the table available to the buffer's inserts
+        ids = list(CallQualitySample.objects.filter(at__lt=cutoff).values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        deleted += CallQualitySample.objects.filter(id__in=ids).delete()[0]
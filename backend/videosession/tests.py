@@ -1,3 +1,99 @@
-from django.test import TestCase
+import datetime
 
-# Create your tests here.
+import jwt
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import AccessToken
+
+from advocateshub.models import User
+from bookingapi.models import Booking
+from clientapi.models import Client
+from lawyerapi.models import Lawyer
+from videosession.providers import FakeProvider
+
+
+@override_settings(COMMS_PROVIDER='videosession.providers.FakeProvider', FAKE_COMMS_LATENCY_MS=0)
+class TokenEndpointTests(TestCase):
+    """The chat and video token endpoints, run offline against FakeProvider."""
+
+    @classmethod
+    def setUpTestData(cls):
+        client_user = User.objects.create_user(
+            username='client', email='client@example.com', name='Client', phone='1', role='client', password='x',
+        )
+        lawyer_user = User.objects.create_user(
+            username='lawyer', email='lawyer@example.com', name='Lawyer', phone='2', role='lawyer', password='x',
+        )
+        cls.outsider = User.objects.create_user(
+            username='outsider', email='outsider@example.com', name='Outsider', phone='3', role='client', password='x',
+        )
+        client = Client.objects.create(user=client_user, language='en', dob=datetime.date(2000, 1, 1))
+        lawyer = Lawyer.objects.create(
+            user=lawyer_user, cnic='1', education='LLB', location='Lahore', court_level='district',
+            case_types='civil', experience='5 years', availability='weekdays', price=100,
+        )
+        cls.client_user = client_user
+        cls.booking = Booking.objects.create(
+            client=client, lawyer=lawyer, scheduled_for=datetime.datetime(2030, 1, 1, 10), status='confirmed',
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def get(self, name, user, booking_id=None):
+        return self.client.get(
+            reverse(name, kwargs={'booking_id': booking_id or self.booking.id}),
+            headers={'Authorization': f'Bearer {AccessToken.for_user(user)}'},
+        )
+
+    def decode(self, token):
+        return jwt.decode(token, FakeProvider.SIGNING_KEY, algorithms=['HS256'])
+
+    def test_chat_token_creates_and_saves_channel(self):
+        response = self.get('chat_token_create', self.client_user)
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertTrue(data['channel_sid'].startswith('CH'))
+        self.booking.refresh_from_db()
+        self.assertEqual(self.booking.twilio_channel_sid, data['channel_sid'])
+
+        claims = self.decode(data['token'])
+        self.assertEqual(claims['grants']['identity'], str(self.client_user.id))
+        self.assertEqual(claims['grants']['chat']['service_sid'], FakeProvider.CHAT_SERVICE_SID)
+
+        # Repeat requests reuse the saved channel and the cached token
+        again = self.get('chat_token_create', self.client_user).json()
+        self.assertEqual(again, data)
+
+    def test_video_token(self):
+        response = self.get('video_token_retrieve', self.client_user)
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['room'], str(self.booking.id))
+        self.assertEqual(self.decode(data['token'])['grants']['video']['room'], str(self.booking.id))
+
+    def test_tokens_are_not_signed_with_secret_key(self):
+        token = self.get('video_token_retrieve', self.client_user).json()['token']
+        with self.assertRaises(jwt.InvalidSignatureError):
+            jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
+
+    def test_non_participant_is_denied(self):
+        for name in ('chat_token_create', 'video_token_retrieve'):
+            self.assertEqual(self.get(name, self.outsider).status_code, 403)
+
+    def test_missing_booking(self):
+        for name in ('chat_token_create', 'video_token_retrieve'):
+            self.assertEqual(self.get(name, self.client_user, booking_id=self.booking.id + 1000).status_code, 404)
+
+    def test_unauthenticated(self):
+        for name in ('chat_token_create', 'video_token_retrieve'):
+            url = reverse(name, kwargs={'booking_id': self.booking.id})
+            self.assertEqual(self.client.get(url).status_code, 401)
+
+    def test_malformed_authorization_header(self):
+        for header in ('Bearer', 'Bearer a b', 'Bearer not-a-jwt'):
+            for name in ('chat_token_create', 'video_token_retrieve'):
+                url = reverse(name, kwargs={'booking_id': self.booking.id})
+                self.assertEqual(self.client.get(url, headers={'Authorization': header}).status_code, 401)
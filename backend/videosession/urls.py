@@ -1,14 +1,18 @@
 # advocatehub/backend/videosession/urls.py
 
 from django.urls import path
-from .views import VideoTokenRetrieveAPIView, ChatTokenCreateAPIView ,chat_history
+from .views import VideoTokenRetrieveAPIView, ChatTokenCreateAPIView, VideoSessionStatsAPI, CallQualityAPI
+from chat.views import ChatHistoryAPI, BackpressureStatsAPI
 
 # This is the correct configuration to expose your API views.
 urlpatterns = [
     # The URL paths are relative to the 'videosession/' prefix from the main urls.py
     path('video_token/<int:booking_id>/', VideoTokenRetrieveAPIView.as_view(), name='video_token_retrieve'),
     path('chat_token/<int:booking_id>/', ChatTokenCreateAPIView.as_view(), name='chat_token_create'),
-    path('api/video_session/<int:booking_id>/history/', chat_history, name='chat_history'),
+    path('api/video_session/<int:booking_id>/history/', ChatHistoryAPI.as_view(), name='chat_history'),
+    path('api/backpressure/', BackpressureStatsAPI.as_view(), name='ws_backpressure'),
+    path('api/stats/', VideoSessionStatsAPI.as_view(), name='video_session_stats'),
+    path('api/sessions/<int:session_id>/quality/', CallQualityAPI.as_view(), name='call_quality'),
 ]
 
 # backend/videosession/urls.py
@@ -17,5 +21,5 @@ from . import consumers
 
 # WebSocket
 websocket_urlpatterns = [
-    re_path(r'ws/video_session/(?P<booking_id>\w+)/$', consumers.VideoSessionConsumer.as_asgi()),
+    re_path(r'ws/video_session/(?P<booking_id>\d+)/$', consumers.VideoSessionConsumer.as_asgi()),
 ]
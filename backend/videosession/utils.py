@@ -1,8 +1,74 @@
 # File: videosession/utils.py
 
+import asyncio
 import os
+import weakref
+from functools import lru_cache
+
+from django.core.cache import cache
+from twilio.http.async_http_client import AsyncTwilioHttpClient
+from twilio.http.http_client import TwilioHttpClient
 from twilio.jwt.access_token import AccessToken
 from twilio.jwt.access_token.grants import VideoGrant, ChatGrant
+from twilio.rest import Client
+
+# Lifetime of the access tokens we mint, in seconds
+TOKEN_TTL = 3600
+# A cached token is handed out until this long before it expires, then replaced
+TOKEN_REFRESH_MARGIN = 300
+# Seconds to wait on the Twilio REST API before giving up
+TWILIO_HTTP_TIMEOUT = 10
+
+
+def get_twilio_client():
+    """
+    The process-wide Twilio REST client. Reusing it keeps its HTTP session, and
+    so its pooled connections to api.twilio.com, alive between requests.
+    """
+    return _twilio_client(os.environ.get('TWILIO_ACCOUNT_SID'), os.environ.get('TWILIO_AUTH_TOKEN'))
+
+
+@lru_cache(maxsize=1)
+def _twilio_client(account_sid, auth_token):
+    return Client(account_sid, auth_token, http_client=TwilioHttpClient(timeout=TWILIO_HTTP_TIMEOUT))
+
+
+# Event loop -> its async Twilio client
+_async_twilio_clients = weakref.WeakKeyDictionary()
+
+
+def get_async_twilio_client():
+    """
+    The Twilio REST client for the running event loop, for the *_async() API
+    calls. Its aiohttp session belongs to the loop, so there is one per loop.
+    The client does not apply its timeout itself; wrap calls in
+    asyncio.timeout(TWILIO_HTTP_TIMEOUT).
+    """
+    loop = asyncio.get_running_loop()
+    credentials = (os.environ.get('TWILIO_ACCOUNT_SID'), os.environ.get('TWILIO_AUTH_TOKEN'))
+    cached = _async_twilio_clients.get(loop)
+    if cached is None or cached[0] != credentials:
+        client = Client(*credentials, http_client=AsyncTwilioHttpClient(timeout=TWILIO_HTTP_TIMEOUT))
+        cached = _async_twilio_clients[loop] = (credentials, client)
+    return cached[1]
+
+
+def token_cache_key(kind, identity, booking_id):
+    return f'twilio_token:{kind}:{identity}:{booking_id}'
+
+
+async def acached_token(kind, identity, booking_id, mint):
+    """
+    Returns the user's current `kind` token for the booking, calling mint()
+    only when there is none or it is about to expire.
+    """
+    key = token_cache_key(kind, identity, booking_id)
+    token = await cache.aget(key)
+    if token is None:
+        token = mint()
+        await cache.aset(key, token, TOKEN_TTL - TOKEN_REFRESH_MARGIN)
+    return token
+
 
 def generate_twilio_video_token(identity: str, room_name: str) -> str:
     account_sid = os.environ.get('TWILIO_ACCOUNT_SID')
@@ -16,7 +82,7 @@ def generate_twilio_video_token(identity: str, room_name: str) -> str:
     video_grant = VideoGrant(room=room_name)
 
     # Create an Access Token
-    token = AccessToken(account_sid, api_key_sid, api_key_secret, identity=identity)
+    token = AccessToken(account_sid, api_key_sid, api_key_secret, identity=identity, ttl=TOKEN_TTL)
     token.add_grant(video_grant)
 
     return token.to_jwt()
@@ -33,7 +99,7 @@ def generate_twilio_chat_token(identity: str, chat_service_sid: str) -> str:
     chat_grant = ChatGrant(service_sid=chat_service_sid)
 
     # Create an Access Token
-    token = AccessToken(account_sid, api_key_sid, api_key_secret, identity=identity)
+    token = AccessToken(account_sid, api_key_sid, api_key_secret, identity=identity, ttl=TOKEN_TTL)
     token.add_grant(chat_grant)
     
     return token.to_jwt()
\ No newline at end of file
@@ -1,135 +1,163 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser
 from rest_framework import status
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from django.http import JsonResponse
+from django.views import View
 
 from bookingapi.models import Booking
-from advocateshub.models import User
-from twilio.rest import Client
-from twilio.base.exceptions import TwilioRestException
-from .utils import generate_twilio_video_token, generate_twilio_chat_token
-from django.conf import settings
-import os
-from django.http import JsonResponse
-from django.views.decorators.csrf import csrf_exempt
-from django.views.decorators.http import require_http_methods
-from .models import ChatMessage
+from advocateshub.middleware import get_user_for_token
+from .providers import get_provider
+from .utils import acached_token
+from .lifecycle import session_stats
+from .models import CallQualityMinute
 
 
-# Your Twilio Chat Service SID from environment variables or Django settings
-TWILIO_CHAT_SERVICE_SID = os.environ.get('TWILIO_CHAT_SERVICE_SID')
+async def authenticate(request):
+    """
+    The user for the request's `Authorization: Bearer <jwt>` header, or None,
+    including for a malformed header. The async token views below use it in
+    place of DRF's JWTAuthentication, which only runs synchronously.
+    """
+    authentication = JWTAuthentication()
+    header = authentication.get_header(request)
+    try:
+        raw_token = authentication.get_raw_token(header) if header else None
+        raw_token = raw_token and raw_token.decode()
+    except (AuthenticationFailed, InvalidToken, UnicodeDecodeError):
+        return None
+    if raw_token is None:
+        return None
+    user = await get_user_for_token(raw_token)
+    return user if user.is_authenticated else None
+
 
-class ChatTokenCreateAPIView(APIView):
+class ChatTokenCreateAPIView(View):
     """
-    API view to get a Twilio Chat token for a given booking.
-    It will automatically create a Twilio Chat Channel if one doesn't exist.
+    API view to get a chat token for a given booking from the configured provider.
+    It will automatically create a chat channel if one doesn't exist.
+    The channel SID is saved on the booking and tokens are cached, so repeat
+    requests never call the provider.
+
+    Async, so a slow provider call holds a coroutine rather than a worker thread.
     """
-    permission_classes = [IsAuthenticated]
 
-    def get(self, request, booking_id):
+    async def get(self, request, booking_id):
+        user = await authenticate(request)
+        if user is None:
+            return JsonResponse({"detail": "Authentication credentials were not provided."},
+                                status=status.HTTP_401_UNAUTHORIZED)
         try:
-            booking = Booking.objects.get(id=booking_id)
+            booking = await Booking.objects.select_related('client', 'lawyer').aget(id=booking_id)
             
-            if request.user not in [booking.client.user, booking.lawyer.user]:
-                return Response({"detail": "Access denied."}, status=status.HTTP_403_FORBIDDEN)
-
-            account_sid = os.environ.get('TWILIO_ACCOUNT_SID')
-            auth_token = os.environ.get('TWILIO_AUTH_TOKEN')
+            if user.id not in [booking.client.user_id, booking.lawyer.user_id]:
+                return JsonResponse({"detail": "Access denied."}, status=status.HTTP_403_FORBIDDEN)
 
-            # Check if Twilio credentials are set, and return a server error if they aren't
-            if not all([account_sid, auth_token, TWILIO_CHAT_SERVICE_SID]):
-                return Response({"detail": "Twilio credentials or Chat Service SID are not configured."}, 
-                                status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            provider = get_provider()
+            # Check if the provider's credentials are set, and return a server error if they aren't
+            if not provider.chat_configured():
+                return JsonResponse({"detail": "Chat provider credentials or Chat Service SID are not configured."}, 
+                                    status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-            twilio_client = Client(account_sid, auth_token)
-            channel_unique_name = f"chat_{booking_id}"
-            
             try:
-                # Try to retrieve the channel by its unique name.
-                channel = twilio_client.chat.v2.services(TWILIO_CHAT_SERVICE_SID) \
-                                               .channels(channel_unique_name) \
-                                               .fetch()
-            except TwilioRestException as e:
-                # If the channel doesn't exist, the API will return a 404 error.
-                # If a different exception occurs, we'll re-raise it.
-                if e.status == 404:
-                    print(f"Chat channel {channel_unique_name} not found. Creating a new one...")
-                    channel = twilio_client.chat.v2.services(TWILIO_CHAT_SERVICE_SID) \
-                                                   .channels.create(
-                                                       unique_name=channel_unique_name,
-                                                       friendly_name=f"Booking {booking_id} Chat",
-                                                       type='private'
-                                                   )
-                else:
-                    raise e
-            
-            identity = str(request.user.id)
-            token = generate_twilio_chat_token(identity, TWILIO_CHAT_SERVICE_SID)
+                channel_sid = booking.twilio_channel_sid or await self.ensure_channel(provider, booking)
+            except TimeoutError:
+                return JsonResponse({"detail": "Chat provider did not respond in time."},
+                                    status=status.HTTP_504_GATEWAY_TIMEOUT)
 
-            return Response({
+            identity = str(user.id)
+            token = await acached_token(
+                f'{provider.name}:chat', identity, booking.id, lambda: provider.chat_token(identity),
+            )
+
+            return JsonResponse({
                 "token": token,
-                "channel_sid": channel.sid,
+                "channel_sid": channel_sid,
                 "booking_id": booking.id,
             })
 
         except Booking.DoesNotExist:
-            return Response({"detail": "Booking not found."}, status=status.HTTP_404_NOT_FOUND)
+            return JsonResponse({"detail": "Booking not found."}, status=status.HTTP_404_NOT_FOUND)
+
+    async def ensure_channel(self, provider, booking):
+        """Fetches or creates the booking's chat channel and saves its SID on the booking."""
+        channel_sid = await provider.aensure_chat_channel(booking.id)
+        # Both participants may get here at once; they resolve the same unique name
+        await Booking.objects.filter(id=booking.id, twilio_channel_sid__isnull=True).aupdate(
+            twilio_channel_sid=channel_sid,
+        )
+        return channel_sid
 
 
-class VideoTokenRetrieveAPIView(APIView):
+class VideoTokenRetrieveAPIView(View):
     """
-    API view to get a Twilio Video token for a given booking.
+    API view to get a video token for a given booking from the configured provider.
     It uses the booking_id as the video room name.
     """
-    permission_classes = [IsAuthenticated]
 
-    def get(self, request, booking_id):
+    async def get(self, request, booking_id):
+        user = await authenticate(request)
+        if user is None:
+            return JsonResponse({"detail": "Authentication credentials were not provided."},
+                                status=status.HTTP_401_UNAUTHORIZED)
         try:
-            booking = Booking.objects.get(id=booking_id)
+            booking = await Booking.objects.select_related('client', 'lawyer').aget(id=booking_id)
             
-            if request.user not in [booking.client.user, booking.lawyer.user]:
-                return Response({"detail": "Access denied."}, status=status.HTTP_403_FORBIDDEN)
+            if user.id not in [booking.client.user_id, booking.lawyer.user_id]:
+                return JsonResponse({"detail": "Access denied."}, status=status.HTTP_403_FORBIDDEN)
 
-            account_sid = os.environ.get('TWILIO_ACCOUNT_SID')
-            auth_token = os.environ.get('TWILIO_AUTH_TOKEN')
-            # Check if Twilio credentials are set
-            if not all([account_sid, auth_token]):
-                return Response({"detail": "Twilio credentials are not configured."}, 
-                                status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            provider = get_provider()
+            # Check if the provider's credentials are set
+            if not provider.video_configured():
+                return JsonResponse({"detail": "Video provider credentials are not configured."}, 
+                                    status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
             room_name = str(booking.id)
-            identity = str(request.user.id)
+            identity = str(user.id)
             
-            token = generate_twilio_video_token(identity, room_name=room_name)
+            token = await acached_token(
+                f'{provider.name}:video', identity, booking.id, lambda: provider.video_token(identity, room_name),
+            )
 
-            return Response({
+            return JsonResponse({
                 "token": token,
                 "room": room_name,
                 "booking_id": booking.id
             })
         except Booking.DoesNotExist:
-            return Response({"detail": "Booking not found."}, status=status.HTTP_404_NOT_FOUND)
+            return JsonResponse({"detail": "Booking not found."}, status=status.HTTP_404_NOT_FOUND)
 
 
-@csrf_exempt
-@require_http_methods(["GET"])
-def chat_history(request, booking_id):
-    try:
-        booking = Booking.objects.get(id=booking_id)
-        messages = ChatMessage.objects.filter(booking=booking).order_by('timestamp')[:100]
-        
-        return JsonResponse({
-            'messages': [
-                {
-                    'text': msg.text,
-                    'senderName': msg.sender_name,
-                    'senderId': msg.sender_id,
-                    'timestamp': msg.timestamp.isoformat(),
-                }
-                for msg in messages
-            ]
-        })
-    except Booking.DoesNotExist:
-        return JsonResponse({'messages': []})
-    except Exception as e:
-        return JsonResponse({'error': str(e)}, status=500)
\ No newline at end of file
+class VideoSessionStatsAPI(APIView):
+    """
+    Call volume for capacity planning: sessions open now, and the peak
+    concurrency, count and average length of calls over the last ?days=<n>
+    (default 7).
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        days = request.query_params.get('days', '7')
+        if not days.isdigit() or int(days) < 1:
+            return Response({"detail": "Invalid number of days."}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(session_stats(int(days)))
+
+
+class CallQualityAPI(APIView):
+    """Per-minute call quality for each participant of a video session, oldest first."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, session_id):
+        minutes = (
+            CallQualityMinute.objects
+            .filter(session_id=session_id)
+            .order_by('minute', 'user_id')
+            .values(
+                'user_id', 'minute', 'samples', 'avg_rtt_ms', 'max_rtt_ms', 'avg_packet_loss',
+                'max_packet_loss', 'avg_bitrate_kbps', 'min_bitrate_kbps', 'min_frame_height',
+            )
+        )
+        return Response(list(minutes))
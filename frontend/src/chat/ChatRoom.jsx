@@ -19,7 +19,8 @@ const ChatRoom = ({ user }) => {
 
   useEffect(() => {
     if (isActive) {
-      const ws = new WebSocket(`ws://localhost:8000/ws/chat/${bookingId}/`);
+      const token = localStorage.getItem("accessToken");
+      const ws = new WebSocket(`ws://localhost:8000/ws/chat/${bookingId}/?token=${token}`);
 
       ws.onopen = () => console.log("✅ WebSocket connected");
       ws.onmessage = (e) => {
@@ -35,8 +36,9 @@ const ChatRoom = ({ user }) => {
   }, [isActive, bookingId]);
 
   const fetchMessages = async () => {
+    // Newest page of history; older pages are available from res.data.next
     const res = await api.get(`/userapi/history/${bookingId}/`);
-    setMessages(res.data.map(msg => ({
+    setMessages(res.data.results.map(msg => ({
       message: msg.message,
       sender: msg.sender_name,
       timestamp: msg.timestamp
@@ -85,7 +87,7 @@ const ChatRoom = ({ user }) => {
 
   const handleSend = () => {
     if (socket?.readyState === WebSocket.OPEN && message.trim()) {
-      socket.send(JSON.stringify({ message, sender: user.name }));
+      socket.send(JSON.stringify({ message }));
       setMessage("");
     } else {
       console.warn("WebSocket is not open. Message not sent.");
@@ -6,6 +6,7 @@ import { useParams } from 'react-router-dom';
 function LawyerReviewSection() {
   const { id: lawyerId } = useParams();
   const [reviews, setReviews] = useState([]);
+  const [nextPage, setNextPage] = useState(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState('');
   const [formData, setFormData] = useState({ feedback: '', rating: 5 });
@@ -17,7 +18,8 @@ function LawyerReviewSection() {
     const fetchReviews = async () => {
       try {
         const res = await api.get(`/userapi/lawyers/${lawyerId}/reviews/`);
-        setReviews(res.data);
+        setReviews(res.data.results);
+        setNextPage(res.data.next);
       } catch (err) {
         console.error(err);
         setError('Failed to fetch reviews.');
@@ -29,6 +31,22 @@ function LawyerReviewSection() {
     fetchReviews();
   }, [lawyerId]);
 
+  // Reviews come a page at a time, newest first; `next` is the link to the older ones
+  const loadMore = async () => {
+    if (!nextPage) return;
+    setLoading(true);
+    try {
+      const res = await api.get(nextPage);
+      setReviews((prev) => [...prev, ...res.data.results]);
+      setNextPage(res.data.next);
+    } catch (err) {
+      console.error(err);
+      setError('Failed to fetch reviews.');
+    } finally {
+      setLoading(false);
+    }
+  };
+
   const handleSubmit = async (e) => {
     e.preventDefault();
     setSubmitting(true);
@@ -125,6 +143,18 @@ function LawyerReviewSection() {
           )}
         </div>
       ))}
+
+      {nextPage && !loading && (
+        <div className="text-center">
+          <button
+            type="button"
+            onClick={loadMore}
+            className="bg-[#8C2B32] text-white px-5 py-2 rounded hover:bg-red-800"
+          >
+            Load more reviews
+          </button>
+        </div>
+      )}
     </div>
   );
 }
@@ -2,21 +2,13 @@ import React, { useState, useEffect } from 'react';
 import api from '../../apiCalls/axios';
 
 const LawyerReviews = ({ lawyerUserId, averageRating, reviewCount }) => {
-  const [reviews, setReviews] = useState([]);
+  const [histogram, setHistogram] = useState({ 1: 0, 2: 0, 3: 0, 4: 0, 5: 0 });
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
 
-  // Function to calculate rating distribution from raw reviews
-  const calculateRatingDistribution = (reviewsData) => {
-    const counts = { 5: 0, 4: 0, 3: 0, 2: 0, 1: 0 };
-    let totalReviews = 0;
-
-    reviewsData.forEach(review => {
-      if (review.rating >= 1 && review.rating <= 5) {
-        counts[review.rating]++;
-        totalReviews++;
-      }
-    });
+  // Function to calculate rating distribution from the lawyer's per-star review counts
+  const calculateRatingDistribution = (counts) => {
+    const totalReviews = [1, 2, 3, 4, 5].reduce((sum, stars) => sum + (counts[stars] || 0), 0);
 
     const distribution = {
       excellent: { count: counts[5], percentage: totalReviews > 0 ? (counts[5] / totalReviews) * 100 : 0 },
@@ -34,7 +26,7 @@ const LawyerReviews = ({ lawyerUserId, averageRating, reviewCount }) => {
     return distribution;
   };
 
-  const ratingDistribution = calculateRatingDistribution(reviews);
+  const ratingDistribution = calculateRatingDistribution(histogram);
 
   // Helper to render stars based on a rating value
   const renderStars = (rating) => {
@@ -78,8 +70,9 @@ const LawyerReviews = ({ lawyerUserId, averageRating, reviewCount }) => {
       setLoading(true);
       setError(null);
       try {
-        const reviewsResponse = await api.get(`/userapi/lawyers/${lawyerUserId}/reviews/`);
-        setReviews(reviewsResponse.data);
+        // The feed's first page carries the lawyer's stored rating histogram
+        const reviewsResponse = await api.get(`/userapi/lawyers/${lawyerUserId}/reviews/`, { params: { limit: 1 } });
+        setHistogram(reviewsResponse.data.lawyer.rating_histogram);
       } catch (err) {
         console.error('Error fetching reviews:', err);
         setError('Failed to load reviews.');
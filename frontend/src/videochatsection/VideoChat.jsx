@@ -4,6 +4,47 @@ import React, { useState, useEffect, useRef, useCallback } from 'react';
 // In a production app, this would be provided by your backend after authentication.
 const generateId = () => crypto.randomUUID();
 
+// Call-quality telemetry: one getStats() sample every STATS_INTERVAL_MS,
+// sent to the server STATS_BATCH_SIZE samples at a time.
+const STATS_INTERVAL_MS = 2000;
+const STATS_BATCH_SIZE = 5;
+
+// Turns a getStats() report into a telemetry sample. `previous` holds the counters
+// from the last report, so loss and bitrate cover only the interval in between.
+const readCallStats = (report, previous) => {
+  let rttMs = null;
+  let video = null;
+  let received = 0;
+  let lost = 0;
+  let bytes = 0;
+  report.forEach((stat) => {
+    if (stat.type === 'candidate-pair' && stat.nominated && stat.currentRoundTripTime !== undefined) {
+      rttMs = stat.currentRoundTripTime * 1000;
+    } else if (stat.type === 'inbound-rtp') {
+      received += stat.packetsReceived || 0;
+      lost += stat.packetsLost || 0;
+      bytes += stat.bytesReceived || 0;
+      if (stat.kind === 'video') video = stat;
+    }
+  });
+
+  const counters = { received, lost, bytes, at: performance.now() };
+  const sample = {
+    rttMs,
+    packetLoss: null,
+    bitrateKbps: null,
+    frameWidth: video?.frameWidth ?? null,
+    frameHeight: video?.frameHeight ?? null,
+  };
+  if (previous) {
+    const packets = (received - previous.received) + (lost - previous.lost);
+    if (packets > 0) sample.packetLoss = (lost - previous.lost) / packets;
+    const seconds = (counters.at - previous.at) / 1000;
+    if (seconds > 0) sample.bitrateKbps = ((bytes - previous.bytes) * 8) / 1000 / seconds;
+  }
+  return { sample, counters };
+};
+
 // The main application component.
 const App = () => {
   // === State Management ===
@@ -22,11 +63,12 @@ const App = () => {
   const peerConnectionRef = useRef(null);
   const websocketRef = useRef(null);
   const localStreamRef = useRef(null);
+  const lastMessageIdRef = useRef(null); // newest persisted chat message, used to resume on reconnect
 
   // === Constants for the app ===
   // IMPORTANT: Replace '1' with the actual booking ID from your application.
   const BOOKING_ID = 1;
-  const WEBSOCKET_URL = `ws://127.0.0.1:8000/ws/video_session/${BOOKING_ID}/`;
+  const WEBSOCKET_URL = `ws://127.0.0.1:8000/ws/video_session/${BOOKING_ID}/?token=${localStorage.getItem('accessToken')}`;
   const MY_NAME = 'Client'; // Placeholder for the authenticated user's name
 
   // WebRTC configuration using public STUN servers.
@@ -55,6 +97,42 @@ const App = () => {
     }
   }, [messages]);
 
+  // Reports call quality while the call is up, so "video froze" complaints can be diagnosed.
+  useEffect(() => {
+    if (connectionStatus !== 'connected') return undefined;
+
+    let previous = null;
+    let batch = [];
+    const sendBatch = () => {
+      if (!batch.length || websocketRef.current?.readyState !== WebSocket.OPEN) return;
+      const now = performance.now();
+      // Samples carry their age rather than a timestamp, so client clock skew does not matter
+      websocketRef.current.send(JSON.stringify({
+        type: 'call_stats',
+        payload: { samples: batch.map(({ takenAt, ...sample }) => ({ ...sample, ago: Math.round(now - takenAt) })) },
+      }));
+      batch = [];
+    };
+
+    const timer = setInterval(async () => {
+      const pc = peerConnectionRef.current;
+      if (!pc) return;
+      try {
+        const { sample, counters } = readCallStats(await pc.getStats(), previous);
+        previous = counters;
+        batch.push({ ...sample, takenAt: counters.at });
+        if (batch.length >= STATS_BATCH_SIZE) sendBatch();
+      } catch (error) {
+        console.error('❌ Error reading call stats:', error);
+      }
+    }, STATS_INTERVAL_MS);
+
+    return () => {
+      clearInterval(timer);
+      sendBatch();
+    };
+  }, [connectionStatus]);
+
   // === Core Logic: WebRTC and WebSocket Setup ===
   const setupPeerConnection = useCallback(() => {
     if (peerConnectionRef.current) {
@@ -106,7 +184,9 @@ const App = () => {
     }
 
     console.log('Setting up WebSocket connection...');
-    websocketRef.current = new WebSocket(WEBSOCKET_URL);
+    // On reconnect only ask for messages we have not seen yet.
+    const since = lastMessageIdRef.current;
+    websocketRef.current = new WebSocket(since ? `${WEBSOCKET_URL}&since=${since}` : WEBSOCKET_URL);
 
     websocketRef.current.onopen = () => {
       console.log('✅ WebSocket connected');
@@ -118,8 +198,26 @@ const App = () => {
         const data = JSON.parse(event.data);
         console.log('📬 WebSocket message received:', data.type, data);
 
+        if (data.type === 'chat_history') {
+          // All missed messages arrive together in one frame; unless the server
+          // resumed from our last id, it is the whole history and replaces ours.
+          const history = data.payload.messages;
+          if (history.length) {
+            lastMessageIdRef.current = history[history.length - 1].id;
+          }
+          if (data.payload.resumed) {
+            setMessages((prev) => [...prev, ...history]);
+          } else {
+            setMessages(history);
+          }
+          return;
+        }
+
         // Access payload safely using optional chaining.
         const payload = data.payload || data;
+        if (data.type === 'chat_message' && payload.id) {
+          lastMessageIdRef.current = payload.id;
+        }
 
         if (payload.type === 'offer') {
           // Received a WebRTC offer, a new call is starting.